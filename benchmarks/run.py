@@ -0,0 +1,310 @@
+"""Headless benchmarks for the depot engine.
+
+Run from the repository root::
+
+    python -m benchmarks.run                 # compare against baseline.json
+    python -m benchmarks.run --save          # record a new baseline
+    python -m benchmarks.run --cases simulate_day --sizes 10 500
+
+Each case is timed at every fleet size (and, for time-stepped cases, every
+resolution) whose work stays under ``--max-cells`` bus-steps. Wall time is the
+best of ``--repeat`` runs; peak memory is measured in a separate traced run.
+The exit status is 1 when any case is slower than its baseline by more than
+``--tolerance``.
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from engine import (
+    DISPATCH_MINUTES,
+    SITE_LIMIT_KW,
+    ChargerQueue,
+    DemandMeter,
+    FleetStore,
+    GeneratorSource,
+    MetricHistory,
+    TableQuery,
+    TelemetryIngestor,
+    assign_chargers,
+    depot_load,
+    downsample,
+    emissions_summary,
+    estimate_dispatch_risk,
+    load_intensity,
+    load_tariff,
+    optimise_dispatch,
+    parse_telemetry,
+    plan_charging,
+    predict_range,
+    query_rows,
+    simulate_depot,
+    simulate_year,
+    staggered_duty,
+    sweep_grid,
+)
+
+BASELINE = Path(__file__).with_name("baseline.json")
+SIZES = (10, 100, 1_000, 10_000, 100_000, 1_000_000)
+RESOLUTIONS = {"hour": 3600, "15min": 900, "minute": 60, "second": 1}
+
+CASES = {}
+
+
+def case(name, cells, timed=False, sizes=None):
+    """Register ``setup(buses, step_seconds) -> run`` as a benchmark.
+
+    ``cells(buses, step_seconds)`` estimates the work in bus-steps so oversized
+    runs can be skipped before any setup happens.
+    """
+    def register(setup):
+        CASES[name] = {"setup": setup, "cells": cells, "timed": timed, "sizes": sizes}
+        return setup
+    return register
+
+
+def _fleet(buses):
+    return FleetStore.synthetic(buses, seed=0)
+
+
+@case("assign_chargers", cells=lambda buses, step: buses)
+def _assign(buses, step_seconds):
+    soc = _fleet(buses).soc
+    return lambda: assign_chargers(soc, max(buses // 10, 1))
+
+
+@case("charger_queue_update", cells=lambda buses, step: buses)
+def _queue(buses, step_seconds):
+    fleet = _fleet(buses)
+    queue = ChargerQueue(fleet.soc, max(buses // 10, 1), 60)
+    rng = np.random.default_rng(1)
+    bus = rng.integers(0, buses, 1000).tolist()
+    soc = rng.uniform(0, 100, 1000).tolist()
+
+    def run():
+        for b, s in zip(bus, soc):
+            queue.update(b, s)
+    return run
+
+
+@case("simulate_day", cells=lambda buses, step: buses * 86400 // step, timed=True)
+def _simulate(buses, step_seconds):
+    soc = _fleet(buses).soc
+    pull_out, pull_in = staggered_duty(buses)
+
+    def run():
+        simulate_depot(soc, max(buses // 3, 1), hours=24, step_minutes=step_seconds / 60,
+                       pull_out=pull_out, pull_in=pull_in)
+    return run
+
+
+@case("plan_charging", cells=lambda buses, step: buses * 86400 // step, timed=True)
+def _plan(buses, step_seconds):
+    soc = _fleet(buses).soc
+    minutes = step_seconds / 60
+    intervals = 86400 // step_seconds
+    prices = load_tariff().prices("2026-01-05", intervals, minutes)
+
+    def run():
+        plan_charging(soc, max(buses // 3, 1), prices, interval_minutes=minutes,
+                      site_limit_kw=buses * 50.0)
+    return run
+
+
+@case("monte_carlo_risk", cells=lambda buses, step: buses * 1000 * 36)
+def _monte_carlo(buses, step_seconds):
+    soc = _fleet(buses).soc
+
+    def run():
+        estimate_dispatch_risk(soc, max(buses // 2, 1), 60, scenarios=1000, workers=1)
+    return run
+
+
+@case("sweep_grid", cells=lambda buses, step: 91 * 46 * 41 * 100, sizes=(100,))
+def _sweep(buses, step_seconds):
+    soc = _fleet(100).soc
+
+    def run():
+        sweep_grid(soc, np.arange(10, 101), np.arange(5, 51), np.arange(40, 81))
+    return run
+
+
+@case("predict_range", cells=lambda buses, step: buses)
+def _range(buses, step_seconds):
+    fleet = _fleet(buses)
+    return lambda: predict_range(fleet.soc, 5, 80, health=fleet.health, bus_type=fleet.bus_type)
+
+
+@case("ess_dispatch", cells=lambda buses, step: 86400 // step * 401 * 15 * 25, timed=True, sizes=(1,))
+def _ess(buses, step_seconds):
+    # A day of depot load with demand charges; cells ~ SoC levels x moves per
+    # interval, over the plain solve and a batch of caps per demand charge
+    minutes = step_seconds / 60
+    _, load_kw = depot_load(_fleet(60).soc, 24, step_minutes=minutes)
+    tariff = load_tariff()
+    times = np.datetime64("2026-01-05") + np.arange(load_kw.size) * np.timedelta64(step_seconds, "s")
+    prices, demand = tariff.rates(times), tariff.demand_terms(times)
+    return lambda: optimise_dispatch(load_kw, prices, minutes, grid_limit_kw=SITE_LIMIT_KW, demand=demand)
+
+
+@case("table_query", cells=lambda buses, step: buses)
+def _table(buses, step_seconds):
+    fleet = _fleet(buses)
+    query = TableQuery(sort_by="soc", descending=True, soc_below=60, maintenance=True, page=2)
+    return lambda: fleet.frame({"Bus": "labels", "SOC": "soc"}, rows=query_rows(fleet, query).rows)
+
+
+@case("telemetry_ingest", cells=lambda buses, step: buses)
+def _telemetry(buses, step_seconds):
+    # One chunk of ``buses`` records (10% charger output) parsed and published
+    fleet = _fleet(buses)
+    source = GeneratorSource(buses, rate=None, batch=buses, seed=0)
+    ingestor = TelemetryIngestor(source, fleet)
+    data = source.read()
+    return lambda: ingestor.publish(parse_telemetry(data))
+
+
+@case("history_record", cells=lambda buses, step: buses * 1000)
+def _history(buses, step_seconds):
+    # 1000 samples of every bus into a ring that has already wrapped
+    fleet = _fleet(buses)
+    history = MetricHistory(500, buses, 24)
+    charger_kw = np.zeros(24, dtype=np.float32)
+
+    def run():
+        for t in range(1000):
+            history.record(float(t), fleet.soc, charger_kw, 0.0)
+        history.window(3600)
+    return run
+
+
+@case("downsample", cells=lambda buses, step: buses)
+def _downsample(buses, step_seconds):
+    # ``buses`` samples of a noisy day cut to 1000 points, both methods
+    x = np.arange(buses, dtype=np.float64)
+    y = np.random.default_rng(0).normal(1000.0, 100.0, buses)
+
+    def run():
+        downsample(x, y, 1000, "minmax")
+        downsample(x, y, 1000, "lttb")
+    return run
+
+
+@case("demand_meter", cells=lambda buses, step: 30 * 86400 // step, timed=True, sizes=(1,))
+def _demand(buses, step_seconds):
+    # A month of site readings fed in hour-long batches
+    per_hour = 3600 // step_seconds
+    times = np.arange(30 * 24 * per_hour, dtype=np.float64) * step_seconds
+    kw = np.random.default_rng(0).uniform(0.0, 2800.0, times.size)
+
+    def run():
+        meter = DemandMeter()
+        for start in range(0, times.size, per_hour):
+            meter.update(times[start:start + per_hour], kw[start:start + per_hour])
+    return run
+
+
+@case("tariff_cost", cells=lambda buses, step: 8 * 365 * 86400 // step, timed=True, sizes=(1,))
+def _tariff(buses, step_seconds):
+    # A year of site load priced in one call; cells ~ arrays touched per sample
+    tariff = load_tariff()
+    times = np.datetime64("2026-01-01") + np.arange(365 * 86400 // step_seconds) * np.timedelta64(step_seconds, "s")
+    kw = np.random.default_rng(0).uniform(0.0, 2800.0, times.size)
+    return lambda: tariff.cost(times, kw)
+
+
+@case("grid_emissions", cells=lambda buses, step: 4 * 365 * 86400 // step, timed=True, sizes=(1,))
+def _emissions(buses, step_seconds):
+    # A year of fleet charging load against the hourly grid intensity table
+    intensity = load_intensity()
+    times = np.datetime64("2026-01-01") + np.arange(365 * 86400 // step_seconds) * np.timedelta64(step_seconds, "s")
+    kw = np.random.default_rng(0).uniform(0.0, 2800.0, times.size)
+    return lambda: emissions_summary(times, kw, step_seconds / 60, intensity)
+
+
+@case("annual_year", cells=lambda buses, step: buses * 365 * 86400 // step
+      + buses * 365 * 86400 // max(step, DISPATCH_MINUTES * 60) * 50, timed=True, sizes=(60,))
+def _annual(buses, step_seconds):
+    # The Cost & Emissions year; cells ~ bus-steps plus the ESS optimisation,
+    # which never runs finer than DISPATCH_MINUTES
+    fleet = _fleet(buses)
+    return lambda: simulate_year(fleet.soc, 24, load_tariff(), 2026, step_minutes=step_seconds / 60,
+                                 site_limit_kw=SITE_LIMIT_KW)
+
+
+def measure(run, repeat):
+    run()  # warm-up
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 2**20
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=sorted(CASES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS), default=list(RESOLUTIONS))
+    parser.add_argument("--max-cells", type=float, default=5e7,
+                        help="skip runs with more bus-steps of work than this")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown vs baseline before failing (0.25 = 25%%)")
+    parser.add_argument("--noise-floor", type=float, default=0.001,
+                        help="ignore slowdowns smaller than this many seconds")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="write results as the new baseline")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    results = {}
+    regressions = []
+
+    print(f"{'case':<42}{'seconds':>12}{'peak MB':>10}{'vs base':>10}")
+    for name in args.cases:
+        spec = CASES[name]
+        resolutions = args.resolutions if spec["timed"] else [None]
+        for buses in spec["sizes"] or args.sizes:
+            for res in resolutions:
+                step_seconds = RESOLUTIONS[res] if res else 60
+                key = f"{name}[{buses}" + (f",{res}]" if res else "]")
+                if spec["cells"](buses, step_seconds) > args.max_cells:
+                    print(f"{key:<42}{'skipped':>12}")
+                    continue
+                run = spec["setup"](buses, step_seconds)
+                seconds, peak_mb = measure(run, args.repeat)
+                results[key] = {"seconds": seconds, "peak_mb": peak_mb}
+
+                ratio = ""
+                if key in baseline:
+                    base = baseline[key]["seconds"]
+                    change = seconds / base
+                    ratio = f"{change:.2f}x"
+                    if change > 1 + args.tolerance and seconds - base > args.noise_floor:
+                        regressions.append(key)
+                        ratio += " !"
+                print(f"{key:<42}{seconds:>12.6f}{peak_mb:>10.1f}{ratio:>10}")
+
+    if args.save:
+        args.baseline.write_text(json.dumps({**baseline, **results}, indent=2, sort_keys=True) + "\n")
+        print(f"baseline written to {args.baseline}")
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
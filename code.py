@@ -1,19 +1,260 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+from contextlib import nullcontext
 from datetime import datetime
-import random
-
-# Try importing plotly, use fallback if not available
-try:
-    import plotly.graph_objects as go
-    import plotly.express as px
-    plotly_available = True
-except ImportError:
-    plotly_available = False
-    import matplotlib.pyplot as plt
-    import matplotlib
-    matplotlib.use('Agg')
+
+from engine import (
+    CACHE_ENTRIES,
+    CACHE_TTL,
+    DATA_VERSION,
+    SITE_LIMIT_KW,
+    TELEMETRY_PORT,
+    DemandMeter,
+    FigureManager,
+    FileTailSource,
+    FleetAggregates,
+    FleetStore,
+    GeneratorSource,
+    MetricHistory,
+    TableQuery,
+    TcpSource,
+    TelemetryIngestor,
+    UdpSource,
+    available_tariffs,
+    cost_summary,
+    daily_profile,
+    depot_load,
+    downsample,
+    get_backend,
+    load_tariff,
+    optimise_dispatch,
+    plan_charging,
+    predict_range,
+    query_rows,
+    range_status,
+    simulate_year,
+    soc_band_labels,
+    staggered_duty,
+)
+
+# Pick plotly if installed, else matplotlib. The library is only imported
+# when the first chart is drawn; Streamlit already loads plotly itself, so
+# that only delays the matplotlib fallback
+plots = get_backend()
+plotly_available = plots.interactive
+
+# Depot configuration
+DEPOT_BUSES = 60  # buses based at this depot: the first DEPOT_BUSES of the fleet
+FLEET_SIZES = [60, 500, 1_000, 10_000, 50_000, 100_000]
+TABLE_PAGE_SIZE = 100
+TABLE_SORTS = {"Bus ID": "bus_id", "SOC": "soc", "Battery Health": "health", "Est. Range": "range_km"}
+NUM_CHARGERS = 24
+TARIFFS = available_tariffs()  # tariff name -> definition file under data/tariffs
+PLAN_START, PLAN_INTERVALS = 20, 48  # overnight plan: 20:00-08:00 in 15-minute intervals
+ESS_STEP_MINUTES = 5  # ESS dispatch resolution over the day
+ANNUAL_STEP_MINUTES = 60  # the Cost & Emissions year runs as 8760 hourly steps
+TELEMETRY_SOURCES = ["Synthetic snapshot", "Gateway simulator", "File tail", "UDP", "TCP"]
+TELEMETRY_FILE = "telemetry.log"  # tailed by the "File tail" source
+HISTORY_SAMPLE_SECONDS = 10
+HISTORY_SAMPLES = 24 * 3600 // HISTORY_SAMPLE_SECONDS  # a day of telemetry history per session
+CHART_POINTS = 1000  # about a half-width chart's pixels; longer series are downsampled
+REFRESH_INTERVALS = {"10 s": 10, "30 s": 30, "1 min": 60, "5 min": 300}
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL)
+def load_fleet(date, fleet_size, data_version):
+    return FleetStore.synthetic(fleet_size, seed=date.toordinal(), label_prefix="BUS ", soc_range=(35, 99))
+
+
+def plan_start(date):
+    """Start of the overnight plan that begins on ``date``."""
+    return np.datetime64(date) + np.timedelta64(PLAN_START, "h")
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL)
+def overnight_plan(arrival_soc, tariff_path, date, tou_period):
+    tariff = load_tariff(tariff_path)
+    start = plan_start(date)
+    pull_out, _ = staggered_duty(DEPOT_BUSES, seed=7)
+    return plan_charging(
+        arrival_soc,
+        NUM_CHARGERS,
+        tariff.prices(start, PLAN_INTERVALS),
+        departure=((pull_out[:, 0] + 24 - PLAN_START) * 4).astype(int),
+        max_price=tariff.rate(tou_period, start),
+        site_limit_kw=SITE_LIMIT_KW,
+    )
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL)
+def charging_profile(arrival_soc):
+    return daily_profile(arrival_soc, NUM_CHARGERS, site_limit_kw=SITE_LIMIT_KW)
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL)
+def bus_ranges(soc, health, bus_type, temperature, load_factor):
+    return predict_range(soc, temperature, load_factor, health=health, bus_type=bus_type)
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL)
+def ess_profile(arrival_soc, tariff_path, date):
+    hours, load_kw = depot_load(arrival_soc, NUM_CHARGERS, step_minutes=ESS_STEP_MINUTES,
+                                site_limit_kw=SITE_LIMIT_KW)
+    tariff = load_tariff(tariff_path)
+    times = np.datetime64(date) + np.arange(hours.size) * np.timedelta64(ESS_STEP_MINUTES, "m")
+    # The day's peak is priced as if it set the month's billed demand
+    return optimise_dispatch(load_kw, tariff.rates(times), ESS_STEP_MINUTES,
+                             grid_limit_kw=SITE_LIMIT_KW, demand=tariff.demand_terms(times))
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL, show_spinner="Simulating the year…")
+def annual_costs(arrival_soc, tariff_path, year):
+    annual = simulate_year(arrival_soc, NUM_CHARGERS, load_tariff(tariff_path), year,
+                           step_minutes=ANNUAL_STEP_MINUTES, site_limit_kw=SITE_LIMIT_KW)
+    return cost_summary(annual)
+
+
+def planned_charger_kw(plan, now):
+    """Charger output the overnight plan schedules for ``now`` (all zero outside it)."""
+    interval = int((now.hour + now.minute / 60 - PLAN_START) % 24 * 4)
+    if interval >= PLAN_INTERVALS:
+        return np.zeros(NUM_CHARGERS)
+    return plan.charger_power()[interval]
+
+
+def telemetry_source(name, fleet_size):
+    if name == "Gateway simulator":
+        return GeneratorSource(fleet_size, NUM_CHARGERS)
+    if name == "File tail":
+        return FileTailSource(TELEMETRY_FILE)
+    if name == "UDP":
+        return UdpSource(port=TELEMETRY_PORT)
+    return TcpSource(port=TELEMETRY_PORT)
+
+
+def history_by_hour(times, *series):
+    """Telemetry samples on the charts' 0-24 h axis, broken where the day wraps."""
+    offset = datetime.now().astimezone().utcoffset().total_seconds()
+    hours = (times + offset) % 86400 / 3600
+    wrap = np.flatnonzero(np.diff(hours) < 0) + 1
+    return [np.insert(np.asarray(a, dtype=float), wrap, np.nan) for a in (hours, *series)]
+
+
+# Charts are built once per session (layout, axes, styling) and afterwards
+# only have their trace data and the current-hour marker swapped in place
+def build_charging_chart(backend):
+    if backend.interactive:
+        go = backend.go
+        fig = go.Figure()
+        fig.add_trace(go.Bar(name="Charging Power (kW)", marker_color='#0055A4', yaxis='y'))
+        fig.add_trace(go.Scatter(name="Average SOC (%)", marker_color='#FF6B6B', yaxis='y2',
+                                 line=dict(width=3)))
+        # Telemetry history (empty until a live source is selected)
+        fig.add_trace(go.Scatter(name="Measured Power (kW)", mode='lines', yaxis='y',
+                                 line=dict(color='#003366', width=1)))
+        fig.add_trace(go.Scatter(name="Measured SOC (%)", mode='lines', yaxis='y2',
+                                 line=dict(color='#C0392B', width=1, dash='dot')))
+        fig.update_layout(
+            xaxis=dict(title="Hour of Day", tickmode='linear', tick0=0, dtick=2),
+            yaxis=dict(title="Charging Power (kW)", side='left', rangemode='tozero'),
+            yaxis2=dict(title="State of Charge (%)", side='right', overlaying='y', range=[0, 100]),
+            hovermode='x unified',
+            height=400,
+            margin=dict(l=0, r=0, t=30, b=0),
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        )
+        # Red dashed current-hour marker; moved by update_charging_chart
+        fig.add_vline(x=0, line_dash="dash", line_color="red", opacity=0.5)
+        return fig
+
+    plt = backend.plt
+    fig, ax1 = plt.subplots(figsize=(10, 4))
+    bars = ax1.bar(np.arange(24), np.zeros(24), color='#0055A4', alpha=0.7, label='Charging Power')
+    ax1.set_xlabel('Hour of Day')
+    ax1.set_ylabel('Charging Power (kW)', color='#0055A4')
+    ax1.tick_params(axis='y', labelcolor='#0055A4')
+    ax2 = ax1.twinx()
+    line, = ax2.plot([], [], color='#FF6B6B', linewidth=3, label='SOC %')
+    measured_power, = ax1.plot([], [], color='#003366', linewidth=1, label='Measured Power')
+    measured_soc, = ax2.plot([], [], color='#C0392B', linewidth=1, linestyle=':', label='Measured SOC')
+    ax2.set_ylabel('State of Charge (%)', color='#FF6B6B')
+    ax2.tick_params(axis='y', labelcolor='#FF6B6B')
+    ax2.set_ylim(0, 100)
+    marker = ax1.axvline(x=0, color='red', linestyle='--', alpha=0.5)
+    ax1.set_title('Charging Window Optimization')
+    fig.tight_layout()
+    return fig, (ax1, bars, line, marker, measured_power, measured_soc)
+
+
+def update_charging_chart(chart, hours, power, soc, current_hour, measured):
+    (power_hours, measured_power), (soc_hours, measured_soc) = measured
+    if plotly_available:
+        with chart.batch_update():
+            chart.data[0].x, chart.data[0].y = hours, power
+            chart.data[1].x, chart.data[1].y = hours, soc
+            chart.data[2].x, chart.data[2].y = power_hours, measured_power
+            chart.data[3].x, chart.data[3].y = soc_hours, measured_soc
+            chart.layout.shapes[0].x0 = chart.layout.shapes[0].x1 = current_hour
+        return
+    _, (ax1, bars, line, marker, power_line, soc_line) = chart
+    for bar, x, height in zip(bars, hours, power):
+        bar.set_x(x - bar.get_width() / 2)
+        bar.set_height(height)
+    line.set_data(hours, soc)
+    power_line.set_data(power_hours, measured_power)
+    soc_line.set_data(soc_hours, measured_soc)
+    marker.set_xdata([current_hour, current_hour])
+    ax1.relim()
+    ax1.autoscale_view()
+
+
+def build_ess_chart(backend):
+    if backend.interactive:
+        go = backend.go
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(fill='tozeroy', name='ESS Charge/Discharge', line=dict(color='#2E86AB')))
+        fig.add_trace(go.Scatter(name='Grid Draw', line=dict(color='#A23B72', dash='dot')))
+        fig.add_trace(go.Scatter(name='Measured Grid Draw', mode='lines', line=dict(color='#6C3483', width=1)))
+        fig.update_layout(
+            title="ESS vs Grid Demand",
+            xaxis_title="Hour",
+            yaxis_title="Power (kW)",
+            height=300,
+            margin=dict(l=0, r=0, t=40, b=0)
+        )
+        return fig
+
+    plt = backend.plt
+    fig, ax = plt.subplots(figsize=(8, 3))
+    line, = ax.plot([], [], color='#A23B72', linestyle='--', label='Grid Draw')
+    measured, = ax.plot([], [], color='#6C3483', linewidth=1, label='Measured Grid Draw')
+    ax.set_xlabel('Hour')
+    ax.set_ylabel('Power (kW)')
+    ax.set_title('ESS vs Grid Demand')
+    return fig, (ax, line, measured)
+
+
+def update_ess_chart(chart, hours, ess_kw, grid_kw, measured):
+    if plotly_available:
+        with chart.batch_update():
+            chart.data[0].x, chart.data[0].y = hours, ess_kw
+            chart.data[1].x, chart.data[1].y = hours, grid_kw
+            chart.data[2].x, chart.data[2].y = measured
+        return
+    fig, (ax, line, measured_line) = chart
+    # Filled areas cannot be re-fed data, so only they are redrawn
+    for area in list(ax.collections):
+        area.remove()
+    ax.fill_between(hours, 0, ess_kw, where=ess_kw > 0, color='#2E86AB', alpha=0.5, label='ESS Charging')
+    ax.fill_between(hours, 0, ess_kw, where=ess_kw < 0, color='#2E86AB', alpha=0.8, label='ESS Discharging')
+    line.set_data(hours, grid_kw)
+    measured_line.set_data(*measured)
+    ax.relim()
+    ax.autoscale_view()
+    ax.legend(loc='upper right')
+    fig.tight_layout()
+
 
 # Page configuration
 st.set_page_config(
@@ -42,7 +283,7 @@ with st.expander("📋 Setup Instructions & Requirements", expanded=False):
     - 4GB RAM recommended
     
     ### 📚 Dependencies
-    - streamlit ≥ 1.28.0
+    - streamlit ≥ 1.37.0 (live tiles use st.fragment(run_every=...))
     - pandas ≥ 2.0.0  
     - numpy ≥ 1.24.0
     - plotly ≥ 5.14.0 (optional - falls back to matplotlib)
@@ -119,61 +360,258 @@ load_factor = st.sidebar.slider(
     help="Higher passenger load increases energy consumption"
 )
 
-# Time-of-Use rate selection
+# Tariff (seasonal ToU energy rates and demand charges) and the ToU period cap
+tariff_name = st.sidebar.selectbox(
+    "Tariff",
+    list(TARIFFS),
+    help="Definitions are read from data/tariffs/*.json"
+)
+tariff_path = TARIFFS[tariff_name]
+tariff = load_tariff(tariff_path)
 tou_period = st.sidebar.selectbox(
     "Time-of-Use Period",
-    ["Off-Peak (0.08 $/kWh)", "Mid-Peak (0.12 $/kWh)", "On-Peak (0.18 $/kWh)"],
-    help="Electricity rates vary by time of day"
+    tariff.periods,
+    format_func=lambda period: tariff.label(period, selected_date),
+    help="Most expensive period the overnight plan may charge in (beyond what dispatch readiness needs)"
 )
 
-# Main header
-st.markdown('<p class="main-header">🔋 TransLink Energy Management Console</p>', unsafe_allow_html=True)
-st.markdown('<p class="sub-header">Real-time monitoring and optimization for battery-electric bus fleet</p>', unsafe_allow_html=True)
+# Fleet size (the depot charging view always covers the first DEPOT_BUSES buses)
+fleet_size = st.sidebar.select_slider(
+    "Fleet Size (buses)",
+    FLEET_SIZES,
+    value=DEPOT_BUSES,
+    help="Buses covered by the Battery Health & Range table"
+)
 
-# Key metrics row
-col1, col2, col3, col4 = st.columns(4)
+# Telemetry feed that updates the fleet state in the background
+telemetry_mode = st.sidebar.selectbox(
+    "Telemetry Source",
+    TELEMETRY_SOURCES,
+    help=f"File tail follows {TELEMETRY_FILE}; UDP and TCP listen on port {TELEMETRY_PORT}"
+)
 
-with col1:
-    st.markdown("""
-    <div class="metric-card">
-        <h3 style="color: white; margin: 0;">Fleet SOC</h3>
-        <h1 style="color: white; margin: 0;">87%</h1>
-        <p style="color: rgba(255,255,255,0.8); margin: 0;">↑ 12% from yesterday</p>
-    </div>
-    """, unsafe_allow_html=True)
+# Live mode: only the metric cards and the charging/ESS charts rerun on a timer
+live_updates = st.sidebar.toggle("Live updates", value=True,
+                                 help="Refresh the live tiles without rerunning the whole page")
+refresh_label = st.sidebar.select_slider("Refresh every", list(REFRESH_INTERVALS), value="5 min",
+                                         disabled=not live_updates)
+live_tile = st.fragment(run_every=REFRESH_INTERVALS[refresh_label] if live_updates else None)
 
-with col2:
-    st.markdown("""
-    <div class="warning-card">
-        <h3 style="color: white; margin: 0;">Peak Demand</h3>
-        <h1 style="color: white; margin: 0;">2.4 MW</h1>
-        <p style="color: rgba(255,255,255,0.8); margin: 0;">Near capacity (2.8 MW)</p>
-    </div>
-    """, unsafe_allow_html=True)
+# Fleet state (a per-session copy of the cached snapshot) and overnight charging plan
+fleet_key = (selected_date, fleet_size, DATA_VERSION)
+if st.session_state.get("fleet_key") != fleet_key:
+    st.session_state.fleet = load_fleet(*fleet_key)
+    st.session_state.fleet_key = fleet_key
+fleet = st.session_state.fleet
 
-with col3:
-    st.markdown("""
-    <div class="success-card">
-        <h3 style="color: #2c3e50; margin: 0;">Chargers Active</h3>
-        <h1 style="color: #2c3e50; margin: 0;">18/24</h1>
-        <p style="color: #2c3e50; margin: 0;">6 available</p>
-    </div>
-    """, unsafe_allow_html=True)
+# One ingestion thread per session, restarted when the fleet or source changes
+telemetry_key = (fleet_key, telemetry_mode)
+if st.session_state.get("telemetry_key") != telemetry_key:
+    previous = st.session_state.pop("telemetry", None)
+    if previous is not None:
+        previous.stop()
+    if telemetry_mode != TELEMETRY_SOURCES[0]:
+        try:
+            ingestor = TelemetryIngestor(
+                telemetry_source(telemetry_mode, fleet_size), fleet, NUM_CHARGERS,
+                history=MetricHistory(HISTORY_SAMPLES, DEPOT_BUSES, NUM_CHARGERS),
+                sample_seconds=HISTORY_SAMPLE_SECONDS,
+                demand=DemandMeter(limit_kw=SITE_LIMIT_KW),
+            )
+        except OSError as exc:
+            st.sidebar.error(f"Telemetry source unavailable: {exc}")
+        else:
+            ingestor.start()
+            st.session_state.telemetry = ingestor
+    st.session_state.telemetry_key = telemetry_key
+telemetry = st.session_state.get("telemetry")
+if telemetry is not None:
+    st.sidebar.caption(f"📡 {telemetry.received:,} records ({telemetry.rate:,.0f}/s) · "
+                       f"{telemetry.rejected:,} rejected")
+    if telemetry.error is not None:
+        st.sidebar.warning(f"Telemetry source error: {telemetry.error}")
+
+
+def fleet_lock():
+    """The live ingestor's lock, held while reading what its thread writes."""
+    return telemetry.lock if telemetry is not None else nullcontext()
+
+
+def depot_soc():
+    """Copy of the depot buses' SoC, taken between telemetry updates."""
+    with fleet_lock():
+        return fleet.soc[:DEPOT_BUSES].copy()
+
+
+arrival_soc = depot_soc()
+plan = overnight_plan(arrival_soc, tariff_path, selected_date, tou_period)
+
+
+def current_aggregates():
+    """Running aggregates behind the metric cards.
+
+    A live ingestor keeps its own in step with telemetry; the static snapshot
+    gets one from the plan's current slot. Called from the live tiles, so the
+    slot advances on their timer and not only on full reruns.
+    """
+    if telemetry is not None:
+        return telemetry.aggregates
+    now = datetime.now()
+    aggregates_key = (fleet_key, tariff_name, tou_period, now.hour, now.minute // 15)
+    if st.session_state.get("aggregates_key") != aggregates_key:
+        st.session_state.aggregates = FleetAggregates(fleet.soc, planned_charger_kw(plan, now))
+        st.session_state.aggregates_key = aggregates_key
+    return st.session_state.aggregates
+
+
+# Session's chart objects, patched in place on every rerun
+if "figures" not in st.session_state:
+    st.session_state.figures = FigureManager(plots)
+figures = st.session_state.figures
 
-with col4:
-    # Calculate range factor based on temperature (from Athens study)
-    if temperature < 10 or temperature > 30:
-        range_factor = "↓ Limited"
+def measured_history(chart):
+    """The last day of sampled telemetry for one chart, empty without a live source.
+
+    Series are cut to about CHART_POINTS: power keeps every bucket's min and
+    max so demand peaks survive, SoC keeps its shape (LTTB).
+    """
+    ingestor = st.session_state.get("telemetry")
+    if ingestor is None or len(ingestor.history) < 2:
+        empty = (np.empty(0), np.empty(0))
+        return (empty, empty) if chart == "charging" else empty
+    with ingestor.lock:
+        recent = ingestor.history.window()
+        if chart == "charging":
+            hours, power, soc = history_by_hour(recent.time, recent.charger_kw.sum(axis=1),
+                                                recent.soc.mean(axis=1))
+        else:
+            hours, grid = history_by_hour(recent.time, recent.grid_kw)
+    if chart == "charging":
+        power_hours, power = downsample(hours, power, CHART_POINTS, "minmax")
+        soc_hours, soc = downsample(hours, soc, CHART_POINTS, "lttb")
+        return (power_hours, power), (soc_hours, soc)
+    return downsample(hours, grid, CHART_POINTS, "minmax")
+
+
+# Live tiles: each is a fragment that re-reads the session's fleet when the
+# refresh timer fires, without rerunning the rest of the page
+@live_tile
+def metric_cards():
+    aggregates = current_aggregates()
+    meter = telemetry.demand if telemetry is not None else None
+    # Read the counters in one go so a telemetry batch cannot land halfway
+    with fleet_lock():
+        mean_soc, below, buses = aggregates.mean_soc, aggregates.below, aggregates.buses
+        active, chargers, available = aggregates.active, aggregates.chargers, aggregates.available
+        billed = None if meter is None else (meter.peak_kw, meter.headroom_kw)
+    # Billing demand (highest 15-minute average this month) with live headroom
+    # once chargers have reported for a full window, else tonight's plan
+    if billed is not None and billed[0] is not None:
+        (peak_kw, headroom_kw), peak_source = billed, "15-min billing peak"
     else:
-        range_factor = "✅ Optimal"
+        peak_kw = overnight_plan(depot_soc(), tariff_path, selected_date, tou_period).peak_kw
+        headroom_kw, peak_source = SITE_LIMIT_KW - peak_kw, "overnight plan"
+    peak_mw = peak_kw / 1000
+    headroom_mw = headroom_kw / 1000
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.markdown(f"""
+        <div class="metric-card">
+            <h3 style="color: white; margin: 0;">Fleet SOC</h3>
+            <h1 style="color: white; margin: 0;">{mean_soc:.0f}%</h1>
+            <p style="color: rgba(255,255,255,0.8); margin: 0;">{below:,} of {buses:,} buses below 60%</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col2:
+        capacity_note = "Near capacity" if headroom_mw < 0.1 * SITE_LIMIT_KW / 1000 else f"{headroom_mw:.1f} MW headroom"
+        st.markdown(f"""
+        <div class="warning-card">
+            <h3 style="color: white; margin: 0;">Peak Demand</h3>
+            <h1 style="color: white; margin: 0;">{peak_mw:.1f} MW</h1>
+            <p style="color: rgba(255,255,255,0.8); margin: 0;">{capacity_note} ({SITE_LIMIT_KW / 1000:.1f} MW) · {peak_source}</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col3:
+        st.markdown(f"""
+        <div class="success-card">
+            <h3 style="color: #2c3e50; margin: 0;">Chargers Active</h3>
+            <h1 style="color: #2c3e50; margin: 0;">{active}/{chargers}</h1>
+            <p style="color: #2c3e50; margin: 0;">{available} available</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col4:
+        # Calculate range factor based on temperature (from Athens study)
+        range_factor = range_status(temperature)
     
-    st.markdown(f"""
-    <div style="background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%); padding: 1.5rem; border-radius: 1rem; color: white; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);">
-        <h3 style="color: white; margin: 0;">Range Status</h3>
-        <h1 style="color: white; margin: 0;">{range_factor}</h1>
-        <p style="color: rgba(255,255,255,0.8); margin: 0;">{temperature}°C affects consumption</p>
-    </div>
-    """, unsafe_allow_html=True)
+        st.markdown(f"""
+        <div style="background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%); padding: 1.5rem; border-radius: 1rem; color: white; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);">
+            <h3 style="color: white; margin: 0;">Range Status</h3>
+            <h1 style="color: white; margin: 0;">{range_factor}</h1>
+            <p style="color: rgba(255,255,255,0.8); margin: 0;">{temperature}°C affects consumption</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+
+@live_tile
+def charging_chart():
+    # Simulate a full day of depot charging at 1-minute resolution
+    profile = charging_profile(depot_soc())
+    hours, charging_power, soc_levels = profile.hours, profile.power_kw, profile.mean_soc
+    at_risk = profile.at_risk(60)
+    
+    current_hour = datetime.now().hour
+    chart = figures.chart("charging", build_charging_chart, update_charging_chart,
+                          hours=hours, power=charging_power, soc=soc_levels,
+                          current_hour=current_hour, measured=measured_history("charging"))
+    if plotly_available:
+        st.plotly_chart(chart, use_container_width=True)
+    else:
+        st.pyplot(chart[0])
+    
+    st.caption(f"🕒 Red dashed line indicates current hour. Overnight charging (1-5 AM) optimizes off-peak rates. "
+               f"{at_risk} of {DEPOT_BUSES} buses pull out below 60% SOC.")
+
+
+@live_tile
+def ess_chart():
+    # Cost-optimal ESS charge/discharge cycle against the depot's day
+    dispatch = ess_profile(depot_soc(), tariff_path, selected_date)
+    
+    chart = figures.chart("ess", build_ess_chart, update_ess_chart,
+                          hours=dispatch.hours, ess_kw=dispatch.ess_kw, grid_kw=dispatch.grid_kw,
+                          measured=measured_history("ess"))
+    if plotly_available:
+        st.plotly_chart(chart, use_container_width=True)
+    else:
+        st.pyplot(chart[0])
+    
+    st.caption(f"⚡ Optimised dispatch: energy ${dispatch.baseline_energy_cost:,.0f} → ${dispatch.energy_cost:,.0f} today, "
+               f"demand charges ${dispatch.baseline_demand_cost:,.0f} → ${dispatch.demand_cost:,.0f} "
+               f"if today sets the month's peak; peak draw {dispatch.load_kw.max():,.0f} → {dispatch.grid_kw.max():,.0f} kW.")
+    if telemetry is not None:
+        meter = telemetry.demand
+        with telemetry.lock:
+            demand_kw, headroom_kw = meter.demand_kw, meter.headroom_kw
+            billed_kw, billed_time = meter.peak_kw, meter.peak_time
+            instant_kw = telemetry.aggregates.peak_kw() or 0
+        billing = ("first 15-minute window still filling" if billed_kw is None else
+                   f"billing peak {billed_kw:,.0f} kW at {datetime.fromtimestamp(billed_time):%d %b %H:%M}")
+        st.caption(f"🧾 15-min demand {demand_kw:,.0f} kW · {billing} · "
+                   f"headroom {headroom_kw:,.0f} kW of {SITE_LIMIT_KW:,.0f} kW · "
+                   f"instantaneous 24 h peak {instant_kw:,.0f} kW")
+
+
+# Main header
+st.markdown('<p class="main-header">🔋 TransLink Energy Management Console</p>', unsafe_allow_html=True)
+st.markdown('<p class="sub-header">Real-time monitoring and optimization for battery-electric bus fleet</p>', unsafe_allow_html=True)
+
+# Key metrics row
+metric_cards()
 
 st.markdown("---")
 
@@ -187,131 +625,80 @@ left_col, right_col = st.columns(2)
 with left_col:
     st.markdown("### 📊 Charging Window Optimization")
     
-    # Generate charging schedule data
-    hours = list(range(0, 24))
-    charging_power = []
-    soc_levels = []
-    
-    for hour in hours:
-        # Simulate charging pattern with overnight preference
-        if 1 <= hour <= 5:
-            power = random.uniform(300, 500)  # Overnight charging
-            soc = min(100, 70 + hour * 6)
-        elif 10 <= hour <= 14 or 17 <= hour <= 20:
-            power = random.uniform(100, 200)  # Peak hour limited charging
-            soc = max(30, 90 - hour * 2)
-        else:
-            power = random.uniform(50, 150)  # Trickle charging
-            soc = random.uniform(60, 85)
-        charging_power.append(power)
-        soc_levels.append(soc)
+    charging_chart()
     
-    if plotly_available:
-        # Create dual-axis chart with Plotly
-        fig = go.Figure()
-        
-        fig.add_trace(go.Bar(
-            x=hours,
-            y=charging_power,
-            name="Charging Power (kW)",
-            marker_color='#0055A4',
-            yaxis='y'
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=hours,
-            y=soc_levels,
-            name="Average SOC (%)",
-            marker_color='#FF6B6B',
-            yaxis='y2',
-            line=dict(width=3)
-        ))
-        
-        fig.update_layout(
-            xaxis=dict(title="Hour of Day", tickmode='linear', tick0=0, dtick=2),
-            yaxis=dict(title="Charging Power (kW)", side='left', range=[0, 600]),
-            yaxis2=dict(title="State of Charge (%)", side='right', overlaying='y', range=[0, 100]),
-            hovermode='x unified',
-            height=400,
-            margin=dict(l=0, r=0, t=30, b=0),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    with st.expander("🗓️ Overnight charging plan (site-capped)"):
+        plan_hours = (PLAN_START + np.arange(PLAN_INTERVALS) / 4) % 24
+        st.bar_chart(
+            pd.DataFrame({"Site Power (kW)": plan.site_kw},
+                         index=[f"{int(h):02d}:{int(h % 1 * 60):02d}" for h in plan_hours])
         )
-        
-        # Add vertical line for current hour
-        current_hour = datetime.now().hour
-        fig.add_vline(x=current_hour, line_dash="dash", line_color="red", opacity=0.5)
-        
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        # Fallback to matplotlib
-        fig, ax1 = plt.subplots(figsize=(10, 4))
-        
-        ax1.bar(hours, charging_power, color='#0055A4', alpha=0.7, label='Charging Power')
-        ax1.set_xlabel('Hour of Day')
-        ax1.set_ylabel('Charging Power (kW)', color='#0055A4')
-        ax1.tick_params(axis='y', labelcolor='#0055A4')
-        
-        ax2 = ax1.twinx()
-        ax2.plot(hours, soc_levels, color='#FF6B6B', linewidth=3, label='SOC %')
-        ax2.set_ylabel('State of Charge (%)', color='#FF6B6B')
-        ax2.tick_params(axis='y', labelcolor='#FF6B6B')
-        
-        # Add vertical line for current hour
-        current_hour = datetime.now().hour
-        ax1.axvline(x=current_hour, color='red', linestyle='--', alpha=0.5)
-        
-        plt.title('Charging Window Optimization')
-        plt.tight_layout()
-        st.pyplot(fig)
-    
-    st.caption("🕒 Red dashed line indicates current hour. Overnight charging (1-5 AM) optimizes off-peak rates.")
+        plan_times = plan_start(selected_date) + np.arange(PLAN_INTERVALS) * np.timedelta64(15, "m")
+        bill = tariff.cost(plan_times, plan.site_kw, interval_minutes=15)
+        st.caption(f"Energy {plan.energy_kwh:,.0f} kWh · Cost ${plan.cost:,.0f} · "
+                   f"{int(plan.dispatch_risk(60).sum())} buses below 60% at pull-out · "
+                   f"Peak {plan.peak_kw:,.0f} kW of {SITE_LIMIT_KW:,.0f} kW · "
+                   f"${bill.demand_cost:,.0f} in {tariff_name} demand charges if tonight sets the month's peak")
 
 with right_col:
     st.markdown("### 🔋 Battery Health & Range Prediction")
     
-    # Generate battery health data
-    bus_ids = [f"BUS {i}" for i in range(1, 13)]
-    soc = [random.randint(65, 98) for _ in range(12)]
-    health = [random.randint(92, 100) for _ in range(12)]
-    range_km = []
-    
-    for i in range(12):
-        # Range calculation based on SOC, temperature, and load (from research)
-        base_range = 250 * (soc[i] / 100)
-        temp_factor = 1.0 if 15 <= temperature <= 25 else 0.7 if temperature > 30 else 0.8
-        load_factor_adj = 1.0 - (load_factor / 100) * 0.3
-        range_km.append(base_range * temp_factor * load_factor_adj)
+    sort_col, filter_col = st.columns(2)
+    sort_by = sort_col.selectbox("Sort by", list(TABLE_SORTS), index=1)
+    descending = sort_col.toggle("Descending", value=False)
+    soc_below = filter_col.slider("SOC below (%)", 0, 101, 101, help="101 shows every bus")
+    maintenance_only = filter_col.toggle("Maintenance due only", value=False)
     
-    df_buses = pd.DataFrame({
-        'Bus': bus_ids,
-        'SOC (%)': soc,
-        'Battery Health (%)': health,
-        'Est. Range (km)': [round(r, 1) for r in range_km]
-    })
-    
-    # Color coded dataframe
-    def color_soc(val):
-        if val > 80:
-            return 'background-color: #84fab0'
-        elif val > 50:
-            return 'background-color: #ffe083'
-        else:
-            return 'background-color: #f093fb'
-    
-    styled_df = df_buses.style.applymap(color_soc, subset=['SOC (%)'])
+    # The page is built under the ingestor's lock, so it is one consistent
+    # snapshot of the fleet; rendering it happens after the lock is released
+    with fleet_lock():
+        # Range calculation based on SOC, health, bus type, temperature, and load (from research)
+        range_key = (temperature, load_factor, fleet.version)
+        if st.session_state.get("range_key") != range_key:
+            fleet.range_km[:] = bus_ranges(fleet.soc, fleet.health, fleet.bus_type, temperature, load_factor)
+            fleet.touch()
+            st.session_state.range_key = (temperature, load_factor, fleet.version)
+        
+        table_page = query_rows(fleet, TableQuery(
+            sort_by=TABLE_SORTS[sort_by],
+            descending=descending,
+            soc_below=soc_below if soc_below <= 100 else None,
+            maintenance=True if maintenance_only else None,
+            page=st.session_state.get("table_page", 1) - 1,
+            page_size=TABLE_PAGE_SIZE,
+        ))
+        
+        df_buses = fleet.frame({
+            'Bus': 'labels',
+            'Type': 'type_names',
+            'SOC (%)': 'soc',
+            'Battery Health (%)': 'health',
+            'Est. Range (km)': 'range_km',
+            'Maintenance': 'maintenance'
+        }, rows=table_page.rows)
+        
+        # Color coded SOC bands, binned for the page in one pass
+        df_buses.insert(2, 'SOC Band', soc_band_labels(fleet.soc[table_page.rows]))
     
     st.dataframe(
-        styled_df,
+        df_buses,
         use_container_width=True,
         height=400,
+        hide_index=True,
         column_config={
             "Bus": "Bus ID",
+            "SOC Band": st.column_config.TextColumn("Status", help="🟢 > 80%, 🟡 50-80%, 🟣 ≤ 50% SOC"),
             "SOC (%)": st.column_config.NumberColumn("SOC (%)", format="%d%%"),
             "Battery Health (%)": st.column_config.NumberColumn("Health", format="%d%%"),
-            "Est. Range (km)": st.column_config.NumberColumn("Range (km)", format="%.1f km")
+            "Est. Range (km)": st.column_config.NumberColumn("Range (km)", format="%.1f km"),
+            "Maintenance": st.column_config.CheckboxColumn("Maint.")
         }
     )
     
+    page_col, info_col = st.columns([1, 3])
+    page_col.number_input("Page", min_value=1, value=1, step=1, key="table_page")
+    info_col.caption(table_page.caption())
+    
     st.caption(f"📍 Range estimates adjusted for {temperature}°C and {load_factor}% passenger load (Athens study methodology)")
 
 # Third row - Energy Storage System and Grid Impact
@@ -319,96 +706,47 @@ st.markdown("### ⚡ Energy Storage System Performance")
 col5, col6 = st.columns(2)
 
 with col5:
-    # ESS charge/discharge cycle
-    hours_ess = list(range(0, 24))
-    ess_charge = []
-    grid_draw = []
-    
-    for hour in hours_ess:
-        if 1 <= hour <= 5:
-            ess_charge.append(random.uniform(200, 400))  # ESS charging overnight
-            grid_draw.append(random.uniform(100, 200))
-        elif 17 <= hour <= 21:
-            ess_charge.append(random.uniform(-400, -200))  # ESS discharging during peak
-            grid_draw.append(random.uniform(300, 500))  # Still some grid draw
-        else:
-            ess_charge.append(random.uniform(-100, 100))
-            grid_draw.append(random.uniform(150, 300))
-    
-    if plotly_available:
-        fig_ess = go.Figure()
-        fig_ess.add_trace(go.Scatter(
-            x=hours_ess, y=ess_charge,
-            fill='tozeroy', name='ESS Charge/Discharge',
-            line=dict(color='#2E86AB')
-        ))
-        fig_ess.add_trace(go.Scatter(
-            x=hours_ess, y=grid_draw,
-            name='Grid Draw',
-            line=dict(color='#A23B72', dash='dot')
-        ))
-        fig_ess.update_layout(
-            title="ESS vs Grid Demand",
-            xaxis_title="Hour",
-            yaxis_title="Power (kW)",
-            height=300,
-            margin=dict(l=0, r=0, t=40, b=0)
-        )
-        st.plotly_chart(fig_ess, use_container_width=True)
-    else:
-        # Fallback to matplotlib
-        fig, ax = plt.subplots(figsize=(8, 3))
-        ax.fill_between(hours_ess, 0, ess_charge, where=[x>0 for x in ess_charge], 
-                       color='#2E86AB', alpha=0.5, label='ESS Charging')
-        ax.fill_between(hours_ess, 0, ess_charge, where=[x<0 for x in ess_charge], 
-                       color='#2E86AB', alpha=0.8, label='ESS Discharging')
-        ax.plot(hours_ess, grid_draw, color='#A23B72', linestyle='--', label='Grid Draw')
-        ax.set_xlabel('Hour')
-        ax.set_ylabel('Power (kW)')
-        ax.legend()
-        ax.set_title('ESS vs Grid Demand')
-        plt.tight_layout()
-        st.pyplot(fig)
+    ess_chart()
 
 with col6:
     st.markdown("### 💰 Cost & Emissions Summary")
     
-    # Calculate savings based on research 
-    base_cost = 12500
-    ess_savings = base_cost * 0.27  # 27% cost reduction from OCC/ESS
-    emission_reduction = 13  # 13% reduction
+    # Year-long depot + ESS + tariff simulation from the fleet snapshot's SoC
+    costs = annual_costs(load_fleet(*fleet_key).soc[:DEPOT_BUSES], tariff_path, selected_date.year)
     
     st.markdown(f"""
     <div style="background: #f8f9fa; padding: 1.5rem; border-radius: 1rem;">
-        <h4>Today's Projected Savings</h4>
-        <h2 style="color: #2E86AB;">${int(ess_savings):,}</h2>
-        <p>↓ 27% vs baseline (with ESS integration)</p>
+        <h4>Projected Daily Savings</h4>
+        <h2 style="color: #2E86AB;">${int(costs.ess_savings):,}</h2>
+        <p>↓ {costs.ess_reduction:.1%} vs baseline (with ESS integration, {selected_date.year} average)</p>
         
-        <h4 style="margin-top: 1.5rem;">CO₂ Emissions</h4>
-        <h2 style="color: #2E86AB;">4.2 tCO₂e</h2>
-        <p>↓ {emission_reduction}% vs diesel equivalent</p>
+        <h4 style="margin-top: 1.5rem;">CO₂ Emissions (daily average)</h4>
+        <h2 style="color: #2E86AB;">{costs.emissions_t:.1f} tCO₂e</h2>
+        <p>↓ {costs.emission_reduction:.0f}% vs diesel equivalent</p>
         
         <h4 style="margin-top: 1.5rem;">Peak Demand Reduction</h4>
         <div style="background: #e9ecef; height: 20px; border-radius: 10px;">
-            <div style="background: #0055A4; width: 56%; height: 20px; border-radius: 10px;"></div>
+            <div style="background: #0055A4; width: {costs.peak_reduction:.0f}%; height: 20px; border-radius: 10px;"></div>
         </div>
-        <p>56% reduction during on-peak hours </p>
+        <p>{costs.peak_reduction:.0f}% reduction during on-peak hours </p>
     </div>
     """, unsafe_allow_html=True)
 
 # Footer with recommendations summary
 st.markdown("---")
-st.markdown("""
+st.markdown(f"""
 <div style="background: #e3f2fd; padding: 1rem; border-radius: 0.5rem;">
     <h4>📋 Key Recommendations Applied</h4>
     <ul>
-        <li><strong>Energy Storage System (ESS)</strong> - Shifts charging to off-peak, reducing costs by 27%</li>
+        <li><strong>Energy Storage System (ESS)</strong> - Shifts charging to off-peak, reducing costs by {costs.ess_reduction:.1%}</li>
         <li><strong>Predictive Range Management</strong> - Accounts for temperature and passenger load (Athens methodology)</li>
-        <li><strong>Optimized Charging Windows</strong> - 56% reduction in on-peak grid demand</li>
+        <li><strong>Optimized Charging Windows</strong> - {costs.peak_reduction:.0f}% reduction in on-peak grid demand</li>
         <li><strong>Multi-Objective Optimization</strong> - Balances infrastructure cost, electricity cost, and emissions</li>
     </ul>
 </div>
 """, unsafe_allow_html=True)
 
 # Auto-refresh note
-st.caption("🔄 Dashboard updates every 5 minutes | Based on research from McMaster University, Aristotle University, and Utah Transit Authority case studies")
+refresh_note = f"Live tiles refresh every {refresh_label}" if live_updates else "Live updates paused"
+st.caption(f"🔄 {refresh_note} | Based on research from McMaster University, Aristotle University, and Utah Transit Authority case studies")
+st.caption(f"📈 Chart backend: {plots.describe()}")
@@ -0,0 +1,150 @@
+"""Compute engine behind the depot orchestration and energy dashboards."""
+
+from engine.aggregates import FleetAggregates, RollingMax
+from engine.annual import DISPATCH_MINUTES, WEEKEND_SERVICE, AnnualSummary, simulate_year
+from engine.assignment import assign_chargers, lowest_soc_indices
+from engine.caching import CACHE_ENTRIES, CACHE_TTL, DATA_VERSION
+from engine.charging import ChargingProfile, daily_profile
+from engine.costs import CostSummary, cost_summary
+from engine.demand import DEMAND_WINDOW, DemandMeter
+from engine.downsample import downsample, lttb, minmax
+from engine.emissions import (
+    DEFAULT_INTENSITY,
+    DIESEL_KG_PER_KM,
+    EBUS_KWH_PER_KM,
+    EMISSIONS_DIR,
+    EmissionsSummary,
+    GridIntensity,
+    diesel_equivalent_t,
+    emissions_summary,
+    load_intensity,
+)
+from engine.ess import (
+    DEMAND_CANDIDATES,
+    DEPOT_BASE_KW,
+    ESS_CAPACITY_KWH,
+    ESS_EFFICIENCY,
+    ESS_POWER_KW,
+    EssDispatch,
+    depot_load,
+    optimise_dispatch,
+)
+from engine.history import HistoryWindow, MetricHistory, RingBuffer
+from engine.montecarlo import DispatchRiskEstimate, estimate_dispatch_risk
+from engine.plotting import FigureManager, PlotBackend, get_backend
+from engine.priority import ChargerQueue, IndexedHeap
+from engine.range import predict_range, range_status
+from engine.scheduling import SITE_LIMIT_KW, ChargingSchedule, plan_charging
+from engine.simulation import SimulationResult, simulate_depot, staggered_duty
+from engine.store import FleetStore, bus_labels
+from engine.sweep import SweepResult, sweep_grid
+from engine.table import (
+    SOC_BANDS,
+    TablePage,
+    TableQuery,
+    query_rows,
+    soc_band,
+    soc_band_labels,
+)
+from engine.tariff import (
+    DEFAULT_TARIFF,
+    TARIFF_DIR,
+    DemandCharge,
+    Tariff,
+    TariffCost,
+    available_tariffs,
+    load_tariff,
+)
+from engine.telemetry import (
+    TELEMETRY_PORT,
+    FileTailSource,
+    GeneratorSource,
+    TcpSource,
+    TelemetryBatch,
+    TelemetryIngestor,
+    UdpSource,
+    parse_telemetry,
+)
+
+__all__ = [
+    "CACHE_ENTRIES",
+    "CACHE_TTL",
+    "DATA_VERSION",
+    "DEFAULT_INTENSITY",
+    "DEFAULT_TARIFF",
+    "DEMAND_CANDIDATES",
+    "DEMAND_WINDOW",
+    "DEPOT_BASE_KW",
+    "DIESEL_KG_PER_KM",
+    "DISPATCH_MINUTES",
+    "EBUS_KWH_PER_KM",
+    "EMISSIONS_DIR",
+    "ESS_CAPACITY_KWH",
+    "ESS_EFFICIENCY",
+    "ESS_POWER_KW",
+    "SITE_LIMIT_KW",
+    "SOC_BANDS",
+    "TARIFF_DIR",
+    "TELEMETRY_PORT",
+    "WEEKEND_SERVICE",
+    "AnnualSummary",
+    "ChargerQueue",
+    "ChargingProfile",
+    "ChargingSchedule",
+    "CostSummary",
+    "DemandCharge",
+    "DemandMeter",
+    "DispatchRiskEstimate",
+    "EmissionsSummary",
+    "EssDispatch",
+    "FigureManager",
+    "FileTailSource",
+    "FleetAggregates",
+    "FleetStore",
+    "GeneratorSource",
+    "GridIntensity",
+    "HistoryWindow",
+    "IndexedHeap",
+    "MetricHistory",
+    "PlotBackend",
+    "RingBuffer",
+    "RollingMax",
+    "SimulationResult",
+    "SweepResult",
+    "TablePage",
+    "TableQuery",
+    "Tariff",
+    "TariffCost",
+    "TcpSource",
+    "TelemetryBatch",
+    "TelemetryIngestor",
+    "UdpSource",
+    "assign_chargers",
+    "available_tariffs",
+    "bus_labels",
+    "cost_summary",
+    "daily_profile",
+    "depot_load",
+    "diesel_equivalent_t",
+    "downsample",
+    "emissions_summary",
+    "estimate_dispatch_risk",
+    "get_backend",
+    "load_intensity",
+    "load_tariff",
+    "lowest_soc_indices",
+    "lttb",
+    "minmax",
+    "optimise_dispatch",
+    "parse_telemetry",
+    "plan_charging",
+    "predict_range",
+    "query_rows",
+    "range_status",
+    "simulate_depot",
+    "simulate_year",
+    "soc_band",
+    "soc_band_labels",
+    "staggered_duty",
+    "sweep_grid",
+]
@@ -0,0 +1,76 @@
+"""Running fleet aggregates for the dashboard's metric cards.
+
+Totals are built once from the fleet state and then adjusted by the
+difference each telemetry update makes, so reading a card is O(1) however
+large the fleet is. ``RollingMax`` keeps a time-windowed maximum in a
+monotonic deque: each sample is pushed and popped at most once.
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+class RollingMax:
+    """Largest value pushed within the last ``window`` seconds."""
+
+    def __init__(self, window):
+        self.window = window
+        self._queue = deque()  # (time, value), values strictly decreasing
+
+    def push(self, time, value):
+        queue = self._queue
+        while queue and queue[-1][1] <= value:
+            queue.pop()
+        queue.append((time, value))
+        self._expire(time)
+
+    def _expire(self, now):
+        queue = self._queue
+        while queue and queue[0][0] <= now - self.window:
+            queue.popleft()
+
+    def value(self, now=None):
+        """Current maximum, or None when the window is empty."""
+        if now is not None:
+            self._expire(now)
+        return self._queue[0][1] if self._queue else None
+
+
+class FleetAggregates:
+    """Mean SoC, buses below dispatch SoC, charger occupancy and peak site draw."""
+
+    def __init__(self, soc, charger_kw, min_soc=60.0, active_kw=1.0, peak_window=86400.0):
+        self.min_soc = min_soc
+        self.active_kw = active_kw
+        self.soc_sum = float(np.sum(soc, dtype=np.float64))
+        self.buses = int(np.size(soc))
+        self.below = int(np.count_nonzero(np.asarray(soc) < min_soc))
+        self.chargers = int(np.size(charger_kw))
+        self.active = int(np.count_nonzero(np.asarray(charger_kw) >= active_kw))
+        self.site_kw = float(np.sum(charger_kw, dtype=np.float64))
+        self.demand = RollingMax(peak_window)
+
+    @property
+    def mean_soc(self):
+        return self.soc_sum / self.buses if self.buses else 0.0
+
+    @property
+    def available(self):
+        return self.chargers - self.active
+
+    def peak_kw(self, now=None):
+        """Highest site draw seen in the window, or None before any charger report."""
+        return self.demand.value(now)
+
+    def update_soc(self, old, new):
+        """Account for buses whose SoC went from ``old`` to ``new`` (one entry per bus)."""
+        self.soc_sum += float(np.sum(new, dtype=np.float64) - np.sum(old, dtype=np.float64))
+        self.below += int(np.count_nonzero(new < self.min_soc) - np.count_nonzero(old < self.min_soc))
+
+    def update_chargers(self, old, new, time):
+        """Account for chargers whose output went from ``old`` to ``new`` kW at ``time``."""
+        self.active += int(np.count_nonzero(new >= self.active_kw)
+                           - np.count_nonzero(old >= self.active_kw))
+        self.site_kw += float(np.sum(new, dtype=np.float64) - np.sum(old, dtype=np.float64))
+        self.demand.push(time, self.site_kw)
@@ -0,0 +1,187 @@
+"""Year-long depot simulation behind the Cost & Emissions panel.
+
+The year is streamed one day at a time. The charging simulation carries each
+bus's SoC into the next day, the ESS is dispatched against the day's load and
+prices (carrying its own state of charge), and only running totals outlive
+the day. Memory is therefore bounded by a single day whether the year is run
+as 8760 hours or 525,600 minutes. Below ``DISPATCH_MINUTES`` the ESS is
+dispatched on blocks of that length and holds its power through each block,
+so a minute-resolution year takes tens of seconds rather than half an hour.
+
+Demand charges are settled per calendar month from each day's billed peaks,
+and each day's dispatch only pays for draw above what its month has already
+been billed. Emissions count the grid draw net of the depot's base load, so
+ESS shifting and losses are charged to the fleet.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from engine.emissions import EmissionsSummary, diesel_equivalent_t, load_intensity
+from engine.ess import (
+    DEPOT_BASE_KW,
+    ESS_CAPACITY_KWH,
+    ESS_EFFICIENCY,
+    ESS_POWER_KW,
+    optimise_dispatch,
+)
+from engine.simulation import simulate_depot, staggered_duty
+
+WEEKEND_SERVICE = 0.6  # share of buses running their duty on weekends and holidays
+DISPATCH_MINUTES = 15  # finest step the ESS is dispatched at over a year
+
+
+@dataclass
+class AnnualSummary:
+    year: int
+    step_minutes: float
+    days: int
+    energy_kwh: float  # depot energy without the ESS
+    baseline_cost: float  # energy and demand charges without the ESS, $
+    ess_cost: float  # the same with the optimised ESS
+    baseline_peak_kw: float  # highest monthly billed demand without the ESS
+    ess_peak_kw: float
+    on_peak_kwh: float  # grid energy in the tariff's dearest period without the ESS
+    ess_on_peak_kwh: float
+    emissions: EmissionsSummary  # fleet charging with the ESS against diesel
+
+    @property
+    def savings(self):
+        return self.baseline_cost - self.ess_cost
+
+    @property
+    def ess_reduction(self):
+        """Fraction of the annual bill the ESS saves."""
+        return self.savings / self.baseline_cost if self.baseline_cost else 0.0
+
+    @property
+    def peak_reduction(self):
+        """Percent of on-peak grid energy the ESS displaces."""
+        if not self.on_peak_kwh:
+            return 0.0
+        return 100.0 * (1.0 - self.ess_on_peak_kwh / self.on_peak_kwh)
+
+    @property
+    def daily_cost(self):
+        return self.baseline_cost / self.days
+
+    @property
+    def daily_savings(self):
+        return self.savings / self.days
+
+
+def _blocks(series, block):
+    # Consecutive ``block``-step groups of a day's series, one per row
+    return np.asarray(series).reshape(-1, block)
+
+
+class _Bill:
+    # Energy charges summed as days stream by; demand charges keep the
+    # highest billed kW per (charge, month) and are priced at the end
+    def __init__(self, tariff):
+        self.tariff = tariff
+        self.energy_cost = 0.0
+        self.period_kwh = dict.fromkeys(tariff.periods, 0.0)
+        self.peaks = {charge.name: np.zeros(12) for charge in tariff.demand_charges}
+
+    def add(self, times, kw, interval_minutes, month):
+        day = self.tariff.cost(times, kw, interval_minutes)
+        self.energy_cost += day.energy_cost
+        for period, kwh in day.period_kwh.items():
+            self.period_kwh[period] += kwh
+        for name, billed in day.billed_kw.items():
+            self.peaks[name][month] = max(self.peaks[name][month], billed)
+
+    def billed(self, month):
+        """Demand already billed this month, per charge in tariff order."""
+        return [self.peaks[charge.name][month] for charge in self.tariff.demand_charges]
+
+    @property
+    def total(self):
+        return self.energy_cost + float(sum(
+            charge.rate * self.peaks[charge.name].sum() for charge in self.tariff.demand_charges))
+
+    @property
+    def peak_kw(self):
+        return float(max((peaks.max() for peaks in self.peaks.values()), default=0.0))
+
+
+def simulate_year(arrival_soc, num_chargers, tariff, year, step_minutes=60, duty_seed=7,
+                  weekend_service=WEEKEND_SERVICE, base_kw=DEPOT_BASE_KW, site_limit_kw=None,
+                  capacity_kwh=ESS_CAPACITY_KWH, power_kw=ESS_POWER_KW,
+                  efficiency=ESS_EFFICIENCY, soc_steps=None, intensity=None,
+                  dispatch_minutes=DISPATCH_MINUTES):
+    """Run the depot, ESS and ``tariff`` through every day of ``year``.
+
+    Weekends and the tariff's holidays run a reduced service: only
+    ``weekend_service`` of the buses pull out. ``soc_steps`` defaults to a
+    grid fine enough for the ESS to move a few levels per dispatch step;
+    ``intensity`` to the bundled grid carbon table. Steps shorter than
+    ``dispatch_minutes`` are grouped into dispatch blocks of about that
+    length.
+    """
+    intensity = load_intensity() if intensity is None else intensity
+    pull_out, pull_in = staggered_duty(len(arrival_soc), seed=duty_seed)
+    off = np.random.default_rng(duty_seed).random(len(arrival_soc)) >= weekend_service
+    weekend_out = np.where(off[:, None], 0.0, pull_out)
+    weekend_in = np.where(off[:, None], 0.0, pull_in)
+
+    first = np.datetime64(f"{year}-01-01", "D")
+    dates = np.arange(first, np.datetime64(f"{year + 1}-01-01", "D"))
+    months = dates.astype("datetime64[M]").astype(np.int64) % 12
+    reduced = ~np.is_busday(dates, holidays=tariff.holidays)
+    step = np.timedelta64(int(round(step_minutes * 60)), "s")
+    steps = int(round(24 * 60 / step_minutes))
+    offsets = np.arange(steps) * step
+    block = max(int(dispatch_minutes // step_minutes), 1)
+    while steps % block:
+        block -= 1
+    if soc_steps is None:
+        move_kwh = power_kw * block * step_minutes / 60.0 * np.sqrt(efficiency)
+        soc_steps = max(51, int(np.ceil(4 * capacity_kwh / move_kwh)) + 1)
+    dearest = tariff.periods[int(tariff.season_rates.max(axis=0).argmax())]
+
+    baseline, with_ess = _Bill(tariff), _Bill(tariff)
+    soc, ess_soc = np.asarray(arrival_soc, dtype=np.float64), 0.5
+    energy_kwh = charging_kwh = grid_kg = 0.0
+    for date, month, weekend in zip(dates, months, reduced):
+        day = simulate_depot(soc, num_chargers, hours=24, step_minutes=step_minutes,
+                             pull_out=weekend_out if weekend else pull_out,
+                             pull_in=weekend_in if weekend else pull_in,
+                             site_limit_kw=site_limit_kw)
+        soc = day.final_soc
+        times = date + offsets
+        load_kw = day.power_kw + base_kw
+        demand = [(rate, _blocks(applies, block).any(axis=1))
+                  for rate, applies in tariff.demand_terms(times)]
+        dispatch = optimise_dispatch(_blocks(load_kw, block).mean(axis=1),
+                                     _blocks(tariff.rates(times), block).mean(axis=1),
+                                     block * step_minutes, capacity_kwh=capacity_kwh,
+                                     power_kw=power_kw, efficiency=efficiency,
+                                     initial_soc=ess_soc, soc_steps=soc_steps,
+                                     grid_limit_kw=site_limit_kw, demand=demand,
+                                     billed_kw=with_ess.billed(month))
+        ess_soc = dispatch.soc_kwh[-1] / capacity_kwh
+        # Within a block the ESS holds its power; it cannot export below load
+        grid_kw = np.maximum(load_kw + np.repeat(dispatch.ess_kw, block), 0.0)
+        energy_kwh += float(load_kw.sum()) * step_minutes / 60.0
+        charging_kwh += float(day.power_kw.sum()) * step_minutes / 60.0
+        grid_kg += intensity.emissions_kg(times, grid_kw - base_kw, step_minutes)
+        baseline.add(times, load_kw, step_minutes, month)
+        with_ess.add(times, grid_kw, step_minutes, month)
+
+    return AnnualSummary(
+        year=year,
+        step_minutes=step_minutes,
+        days=dates.size,
+        energy_kwh=energy_kwh,
+        baseline_cost=baseline.total,
+        ess_cost=with_ess.total,
+        baseline_peak_kw=baseline.peak_kw,
+        ess_peak_kw=with_ess.peak_kw,
+        on_peak_kwh=baseline.period_kwh[dearest],
+        ess_on_peak_kwh=with_ess.period_kwh[dearest],
+        emissions=EmissionsSummary(charging_kwh=charging_kwh, grid_t=grid_kg / 1000.0,
+                                   diesel_t=diesel_equivalent_t(charging_kwh)),
+    )
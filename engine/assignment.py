@@ -0,0 +1,26 @@
+"""Charger assignment: pick the lowest-SoC buses without sorting the fleet."""
+
+import numpy as np
+
+
+def lowest_soc_indices(soc, k):
+    """Positions of the ``k`` lowest-SoC buses, in no particular order.
+
+    Uses ``np.argpartition`` (linear time) instead of a full sort, so the cost
+    of picking a handful of buses stays flat as the fleet grows.
+    """
+    soc = np.asarray(soc)
+    n = soc.shape[0]
+    k = max(0, min(int(k), n))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    if k == n:
+        return np.arange(n)
+    return np.argpartition(soc, k - 1)[:k]
+
+
+def assign_chargers(soc, num_chargers):
+    """Boolean mask of buses that get a charger (lowest SoC first)."""
+    mask = np.zeros(len(soc), dtype=bool)
+    mask[lowest_soc_indices(soc, num_chargers)] = True
+    return mask
@@ -0,0 +1,11 @@
+"""Cache settings shared by the dashboards' ``st.cache_data`` functions.
+
+Caches are shared by every session: least recently used entries are evicted
+past ``CACHE_ENTRIES`` and anything older than ``CACHE_TTL`` seconds is
+recomputed. ``DATA_VERSION`` is passed to the cached loaders so bumping it
+invalidates their entries.
+"""
+
+CACHE_ENTRIES = 64
+CACHE_TTL = 3600
+DATA_VERSION = "synthetic-v1"  # bump when the telemetry source changes
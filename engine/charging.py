@@ -0,0 +1,29 @@
+"""Daily depot charging profile for the Charging Window Optimization chart."""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from engine.simulation import simulate_depot, staggered_duty
+
+
+@dataclass
+class ChargingProfile:
+    hours: np.ndarray  # clock hour
+    power_kw: np.ndarray  # mean depot charging power in the hour
+    mean_soc: np.ndarray  # fleet mean SoC at the end of the hour
+    departure_soc: np.ndarray  # per-bus SoC at pull-out
+
+    def at_risk(self, min_soc):
+        return int((self.departure_soc < min_soc).sum())
+
+
+def daily_profile(arrival_soc, num_chargers, duty_seed=7, step_minutes=1,
+                  site_limit_kw=None):
+    """Simulate one duty day from midnight and roll it up by hour."""
+    pull_out, pull_in = staggered_duty(len(arrival_soc), seed=duty_seed)
+    day = simulate_depot(arrival_soc, num_chargers, hours=24, step_minutes=step_minutes,
+                         pull_out=pull_out, pull_in=pull_in, site_limit_kw=site_limit_kw)
+    hours, power_kw, mean_soc = day.hourly()
+    return ChargingProfile(hours=hours, power_kw=power_kw, mean_soc=mean_soc,
+                           departure_soc=day.departure_soc)
@@ -0,0 +1,24 @@
+"""Cost and emissions summary for the Cost & Emissions panel."""
+
+from dataclasses import dataclass
+
+
+@dataclass
+class CostSummary:
+    base_cost: float  # average daily depot electricity cost without ESS, $
+    ess_reduction: float  # fraction of cost saved with ESS
+    emission_reduction: float  # percent below diesel equivalent
+    emissions_t: float  # average daily tCO2e of fleet charging
+    peak_reduction: float  # percent of on-peak grid demand avoided
+
+    @property
+    def ess_savings(self):
+        return self.base_cost * self.ess_reduction
+
+
+def cost_summary(annual):
+    """Headline figures from a year-long simulation (an ``AnnualSummary``)."""
+    return CostSummary(base_cost=annual.daily_cost, ess_reduction=annual.ess_reduction,
+                       emission_reduction=annual.emissions.reduction,
+                       emissions_t=annual.emissions.grid_t / annual.days,
+                       peak_reduction=annual.peak_reduction)
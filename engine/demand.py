@@ -0,0 +1,105 @@
+"""Streaming billing-demand meter.
+
+Utilities bill demand as the highest average power over a rolling 15-minute
+window within the billing period (a calendar month here). ``DemandMeter``
+treats each power reading as holding until the next one, integrates energy
+over batches with a cumulative sum, and reads the window averages off that
+curve. Between calls it keeps only the readings inside the last window, so a
+month of 1-second data costs the same memory as fifteen minutes of it.
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+from engine.scheduling import SITE_LIMIT_KW
+
+DEMAND_WINDOW = 900.0  # seconds
+
+
+def _next_period(time):
+    # Start of the calendar month (local time) after ``time``
+    day = datetime.fromtimestamp(time)
+    year, month = (day.year + 1, 1) if day.month == 12 else (day.year, day.month + 1)
+    return datetime(year, month, 1).timestamp()
+
+
+class DemandMeter:
+    """Rolling window demand, its billing-period peak and headroom to the site limit."""
+
+    def __init__(self, window_seconds=DEMAND_WINDOW, limit_kw=SITE_LIMIT_KW):
+        self.window = window_seconds
+        self.limit_kw = limit_kw
+        self.demand_kw = 0.0  # average over the latest window
+        self.peak_kw = None  # highest full-window average this billing period
+        self.peak_time = None
+        self.period_start = None
+        self._period_end = None
+        self._origin = None  # first reading ever; earlier windows are partial
+        self._time = np.empty(0)
+        self._kw = np.empty(0)
+
+    @property
+    def headroom_kw(self):
+        return self.limit_kw - self.demand_kw
+
+    @property
+    def nbytes(self):
+        return self._time.nbytes + self._kw.nbytes
+
+    def update(self, times, kw):
+        """Feed readings (scalars or arrays) in time order."""
+        times = np.atleast_1d(np.asarray(times, dtype=np.float64))
+        kw = np.atleast_1d(np.asarray(kw, dtype=np.float64))
+        if self._time.size:
+            # Late readings cannot be slotted into the integral; drop them
+            fresh = times >= self._time[-1]
+            times, kw = times[fresh], kw[fresh]
+        if not times.size:
+            return
+        if self._origin is None:
+            self._origin = times[0]
+            self._start_period(times[0])
+        # A batch spanning a month boundary is split so each peak stays in its
+        # period; the window ending on the boundary closes the old month
+        while times[-1] > self._period_end:
+            split = int(np.searchsorted(times, self._period_end, side="right"))
+            self._ingest(times[:split], kw[:split])
+            self._start_period(self._period_end)
+            times, kw = times[split:], kw[split:]
+        self._ingest(times, kw)
+
+    def _start_period(self, time):
+        day = datetime.fromtimestamp(time)
+        self.period_start = datetime(day.year, day.month, 1).timestamp()
+        self._period_end = _next_period(time)
+        self.peak_kw = self.peak_time = None
+
+    def _ingest(self, times, kw):
+        if not times.size:
+            return
+        tail = self._time.size
+        t = np.concatenate((self._time, times))
+        p = np.concatenate((self._kw, kw))
+        energy = np.zeros(t.size)
+        np.cumsum(p[:-1] * np.diff(t), out=energy[1:])
+
+        new = t[tail:]
+        start = np.maximum(new - self.window, self._origin)
+        covered = new - start
+        average = np.where(covered > 0,
+                           (energy[tail:] - np.interp(start, t, energy)) / np.where(covered > 0, covered, 1),
+                           p[tail:])
+        self.demand_kw = float(average[-1])
+
+        full = np.flatnonzero(new - self._origin >= self.window)
+        if full.size:
+            best = full[np.argmax(average[full])]
+            if self.peak_kw is None or average[best] > self.peak_kw:
+                self.peak_kw = float(average[best])
+                self.peak_time = float(new[best])
+
+        # Keep the readings the next window can still reach
+        keep = max(int(np.searchsorted(t, t[-1] - self.window, side="right")) - 1, 0)
+        self._time = t[keep:].copy()
+        self._kw = p[keep:].copy()
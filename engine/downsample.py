@@ -0,0 +1,93 @@
+"""Reduce long series to about a chart's pixel width before plotting.
+
+``minmax`` keeps each bucket's lowest and highest sample, so every peak
+survives (use it for power and demand). ``lttb`` (largest triangle three
+buckets) keeps the samples that best preserve the curve's shape, suiting
+smooth series such as SoC. ``downsample`` picks one of them by name and
+keeps NaN gaps as gaps, collapsing each to a single separator.
+"""
+
+import numpy as np
+
+
+def _minmax_keep(x, y, max_points):
+    n = y.size
+    if n <= max_points:
+        return np.arange(n)
+    size = -(-n // max(max_points // 2, 1))
+    buckets = -(-n // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+    base = np.arange(buckets) * size
+    low = base + np.where(np.isnan(padded), np.inf, padded).argmin(axis=1)
+    high = base + np.where(np.isnan(padded), -np.inf, padded).argmax(axis=1)
+    return np.unique(np.concatenate(([0, n - 1], low, high)))
+
+
+def _lttb_keep(x, y, max_points):
+    n = y.size
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.intp)
+    keep = np.empty(max_points, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    prev = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt = edges[i + 2] if i + 2 < edges.size else n
+        mean_x, mean_y = x[hi:nxt].mean(), y[hi:nxt].mean()
+        area = np.abs((x[prev] - mean_x) * (y[lo:hi] - y[prev])
+                      - (x[prev] - x[lo:hi]) * (mean_y - y[prev]))
+        prev = lo + int(area.argmax())
+        keep[i + 1] = prev
+    return keep
+
+
+def minmax(x, y, max_points):
+    """Every bucket's minimum and maximum, in x order."""
+    keep = _minmax_keep(x, y, max_points)
+    return x[keep], y[keep]
+
+
+def lttb(x, y, max_points):
+    """Largest-triangle-three-buckets: first, last and one point per bucket."""
+    keep = _lttb_keep(x, y, max_points)
+    return x[keep], y[keep]
+
+
+METHODS = {"minmax": _minmax_keep, "lttb": _lttb_keep}  # name -> indices to keep
+
+
+def downsample(x, y, max_points=1000, method="minmax"):
+    """At most about ``max_points`` samples of ``(x, y)``; NaNs in ``y`` stay gaps.
+
+    The valid samples are reduced together, then one NaN separator goes
+    between each pair of kept samples that had NaNs between them, so the
+    output stays within ``max_points`` however the gaps fall.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if y.size <= max_points:
+        return x, y
+    missing = np.isnan(y)
+    if not missing.any():
+        keep = METHODS[method](x, y, max_points)
+        return x[keep], y[keep]
+
+    valid = np.flatnonzero(~missing)
+    nans = np.flatnonzero(missing)
+    nans_before = np.cumsum(missing)
+    budget = max_points
+    while True:
+        keep = valid[METHODS[method](x[valid], y[valid], budget)]
+        # A rise in the NaN count between kept neighbours marks a gap,
+        # drawn at the first NaN after the left neighbour
+        seen = nans_before[keep]
+        separators = nans[seen[np.flatnonzero(np.diff(seen) > 0)]]
+        if keep.size + separators.size <= max_points or budget <= max_points // 2:
+            break
+        # Make room for the separators; at half the budget there always is
+        budget = max(max_points - separators.size - 2, max_points // 2)
+    order = np.sort(np.concatenate((keep, separators)))
+    return x[order], y[order]
@@ -0,0 +1,85 @@
+"""Grid-carbon emissions of the depot's charging against a diesel fleet.
+
+Grid carbon intensity varies with the hour of day and the month. The table is
+a CSV under ``data/emissions`` with one ``month,hour,g_co2e_per_kwh`` row per
+combination, and pricing a load series in carbon is one table lookup per
+interval: a year of minute data takes milliseconds. The diesel baseline turns
+the energy the buses charged into the kilometres it drives and applies a
+diesel bus's tailpipe emissions to them.
+"""
+
+import csv
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from engine.tariff import _month_day_minute
+
+EMISSIONS_DIR = Path(__file__).resolve().parent.parent / "data" / "emissions"
+DEFAULT_INTENSITY = EMISSIONS_DIR / "grid_intensity.csv"
+EBUS_KWH_PER_KM = 1.3  # grid energy per km of a 40 ft battery-electric bus
+DIESEL_KG_PER_KM = 1.35  # about 0.5 L/km at 2.68 kg CO2e per litre
+
+
+@dataclass
+class EmissionsSummary:
+    charging_kwh: float  # energy the buses charged
+    grid_t: float  # tCO2e of the grid energy drawn for it
+    diesel_t: float  # tCO2e of diesel buses covering the same distance
+
+    @property
+    def reduction(self):
+        """Percent below the diesel-equivalent fleet."""
+        return 100.0 * (1.0 - self.grid_t / self.diesel_t) if self.diesel_t else 0.0
+
+
+class GridIntensity:
+    """Hourly grid carbon intensity by month, in kg CO2e per kWh."""
+
+    def __init__(self, table, name=""):
+        self.name = name
+        self.table = table  # (12, 24) kg/kWh
+
+    @classmethod
+    def load(cls, path):
+        table = np.full((12, 24), np.nan)
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                table[int(row["month"]) - 1, int(row["hour"])] = float(row["g_co2e_per_kwh"]) / 1000.0
+        if np.isnan(table).any():
+            month, hour = np.argwhere(np.isnan(table))[0]
+            raise ValueError(f"{path} has no intensity for month {month + 1} hour {hour}")
+        return cls(table, name=Path(path).stem)
+
+    def factors(self, times):
+        """Intensity (kg/kWh) in force at each (local, naive) ``datetime64`` time."""
+        month, _, minute = _month_day_minute(times)
+        return self.table[month, minute // 60]
+
+    def emissions_kg(self, times, kw, interval_minutes):
+        """kg CO2e of power ``kw`` held for ``interval_minutes`` from each time."""
+        kwh = np.asarray(kw, dtype=np.float64) * (interval_minutes / 60.0)
+        return float(kwh @ self.factors(times))
+
+
+def diesel_equivalent_t(charging_kwh, kwh_per_km=EBUS_KWH_PER_KM, kg_per_km=DIESEL_KG_PER_KM):
+    """tCO2e of diesel buses driving the distance ``charging_kwh`` powers."""
+    return charging_kwh / kwh_per_km * kg_per_km / 1000.0
+
+
+def emissions_summary(times, kw, interval_minutes, intensity):
+    """Fleet charging ``kw`` at ``times`` against the diesel-equivalent fleet."""
+    charging_kwh = float(np.sum(kw)) * interval_minutes / 60.0
+    return EmissionsSummary(
+        charging_kwh=charging_kwh,
+        grid_t=intensity.emissions_kg(times, kw, interval_minutes) / 1000.0,
+        diesel_t=diesel_equivalent_t(charging_kwh),
+    )
+
+
+@lru_cache(maxsize=None)
+def load_intensity(path=DEFAULT_INTENSITY):
+    """Parsed intensity table, loaded once per process and path."""
+    return GridIntensity.load(path)
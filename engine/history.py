@@ -0,0 +1,97 @@
+"""Fixed-memory time-series history for live telemetry.
+
+``RingBuffer`` stores every row twice, at ``i`` and ``i + capacity``, so the
+newest ``n`` rows are always one contiguous slice. Appends are O(1) and reads
+are views with no copy. ``MetricHistory`` keeps one ring per metric (per-bus
+SoC, per-charger power, site grid draw) on a shared clock.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+class RingBuffer:
+    """Last ``capacity`` rows of a metric; ``width`` values per row."""
+
+    def __init__(self, capacity, width=None, dtype=np.float32):
+        shape = (2 * capacity,) if width is None else (2 * capacity, width)
+        self._data = np.zeros(shape, dtype=dtype)
+        self.capacity = capacity
+        self._pos = 0  # slot the next row goes to
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+    def append(self, row):
+        pos = self._pos
+        self._data[pos] = row
+        self._data[pos + self.capacity] = row
+        self._pos = (pos + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def extend(self, rows):
+        rows = np.asarray(rows)[-self.capacity:]
+        slots = (self._pos + np.arange(len(rows))) % self.capacity
+        self._data[slots] = rows
+        self._data[slots + self.capacity] = rows
+        self._pos = (self._pos + len(rows)) % self.capacity
+        self._size = min(self._size + len(rows), self.capacity)
+
+    def window(self, n=None):
+        """Read-only view of the newest ``n`` rows (all of them by default), oldest first."""
+        n = self._size if n is None else min(n, self._size)
+        end = self._pos + self.capacity
+        view = self._data[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def clear(self):
+        self._pos = self._size = 0
+
+
+@dataclass
+class HistoryWindow:
+    time: np.ndarray  # unix seconds
+    soc: np.ndarray  # (samples, buses) SoC %
+    charger_kw: np.ndarray  # (samples, chargers) output kW
+    grid_kw: np.ndarray  # site grid draw kW
+
+
+class MetricHistory:
+    """Sampled SoC, charger power and grid draw for the newest ``capacity`` ticks."""
+
+    def __init__(self, capacity, buses, chargers):
+        self.buses = buses
+        self.time = RingBuffer(capacity, dtype=np.float64)
+        self.soc = RingBuffer(capacity, buses)
+        self.charger_kw = RingBuffer(capacity, chargers)
+        self.grid_kw = RingBuffer(capacity)
+
+    def __len__(self):
+        return len(self.time)
+
+    @property
+    def nbytes(self):
+        return sum(ring.nbytes for ring in (self.time, self.soc, self.charger_kw, self.grid_kw))
+
+    def record(self, time, soc, charger_kw, grid_kw):
+        """Append one sample; ``soc`` may hold more buses than are tracked."""
+        self.time.append(time)
+        self.soc.append(soc[:self.buses])
+        self.charger_kw.append(charger_kw)
+        self.grid_kw.append(grid_kw)
+
+    def window(self, seconds=None):
+        """Views of the samples from the last ``seconds`` (everything by default)."""
+        time = self.time.window()
+        n = time.size
+        if seconds is not None and n:
+            n -= int(np.searchsorted(time, time[-1] - seconds))
+        return HistoryWindow(time=time[time.size - n:], soc=self.soc.window(n),
+                             charger_kw=self.charger_kw.window(n), grid_kw=self.grid_kw.window(n))
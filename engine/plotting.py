@@ -0,0 +1,113 @@
+"""Lazily imported plotting backend.
+
+Picking a backend only checks which library is installed
+(``importlib.util.find_spec``); the import itself waits until the first
+chart asks for it. That only saves start-up time when nothing else has
+imported the library already: Streamlit imports ``plotly.graph_objects``
+itself, so in practice the deferral pays off for the matplotlib fallback.
+How long the import took (or that it was already loaded) is kept for
+reporting.
+
+``FigureManager`` keeps each chart's figure for the session and only feeds it
+new data, instead of rebuilding traces, axes and layout on every rerun.
+"""
+
+import importlib
+import importlib.util
+import sys
+import time
+from functools import lru_cache
+
+PREFERRED = ("plotly", "matplotlib")
+
+
+class PlotBackend:
+    def __init__(self, name):
+        self.name = name
+        self.import_seconds = None
+        self.preloaded = False  # already imported by someone else when first used
+        self._modules = None
+
+    @property
+    def interactive(self):
+        return self.name == "plotly"
+
+    @property
+    def loaded(self):
+        return self._modules is not None
+
+    def modules(self):
+        """Import the backend on first use and return its entry modules."""
+        if self._modules is None:
+            self.preloaded = ("plotly.graph_objects" if self.name == "plotly"
+                              else "matplotlib.pyplot") in sys.modules
+            start = time.perf_counter()
+            if self.name == "plotly":
+                self._modules = {"go": importlib.import_module("plotly.graph_objects")}
+            else:
+                matplotlib = importlib.import_module("matplotlib")
+                matplotlib.use("Agg")
+                self._modules = {"plt": importlib.import_module("matplotlib.pyplot")}
+            self.import_seconds = time.perf_counter() - start
+        return self._modules
+
+    @property
+    def go(self):
+        return self.modules()["go"]
+
+    @property
+    def plt(self):
+        return self.modules()["plt"]
+
+    def describe(self):
+        if not self.loaded:
+            return f"{self.name} (not loaded yet)"
+        if self.preloaded:
+            return f"{self.name} (already imported at start-up)"
+        return f"{self.name} (imported in {self.import_seconds * 1000:.0f} ms)"
+
+
+@lru_cache(maxsize=None)
+def get_backend(preferred=PREFERRED):
+    """Process-wide backend: the first installed library in ``preferred``."""
+    for name in preferred:
+        if importlib.util.find_spec(name) is not None:
+            return PlotBackend(name)
+    raise ImportError(f"none of {', '.join(preferred)} is installed")
+
+
+def _freeze(value):
+    if hasattr(value, "tobytes"):
+        return (value.dtype.str, value.shape, value.tobytes())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _fingerprint(data):
+    return hash(tuple((key, _freeze(data[key])) for key in sorted(data)))
+
+
+class FigureManager:
+    """Per-session charts that are built once and then only re-fed data.
+
+    ``chart(name, build, update, **data)`` calls ``build(backend)`` the first
+    time ``name`` is requested and keeps what it returns (a figure, or a
+    figure plus its artists). Later calls run ``update(chart, **data)`` only
+    when ``data`` differs from the previous call, so layout, axes and styling
+    are never rebuilt on a rerun.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._charts = {}
+        self._seen = {}
+
+    def chart(self, name, build, update, **data):
+        if name not in self._charts:
+            self._charts[name] = build(self.backend)
+        fingerprint = _fingerprint(data)
+        if self._seen.get(name) != fingerprint:
+            update(self._charts[name], **data)
+            self._seen[name] = fingerprint
+        return self._charts[name]
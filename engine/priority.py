@@ -0,0 +1,146 @@
+"""Persistent charger priority for streaming single-bus SoC updates.
+
+The fleet is split into two indexed heaps: the ``k`` lowest-SoC buses (the
+ones holding a charger) in a max-heap, and everyone else in a min-heap. A new
+SoC reading moves one bus within its heap and swaps at most one pair across
+the boundary, so an update is O(log n) and the assignment set, the count of
+buses below the dispatch threshold and the fleet SoC sum are always current.
+"""
+
+import numpy as np
+
+from engine.assignment import lowest_soc_indices
+
+
+class IndexedHeap:
+    """Binary min-heap of bus ids with O(log n) key updates by id."""
+
+    def __init__(self, ids, keys):
+        self._ids = list(ids)
+        self._keys = list(keys)
+        self._pos = {bus: i for i, bus in enumerate(self._ids)}
+        for i in reversed(range(len(self._ids) // 2)):
+            self._sift_down(i)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, bus):
+        return bus in self._pos
+
+    def peek(self):
+        return self._ids[0], self._keys[0]
+
+    def push(self, bus, key):
+        self._ids.append(bus)
+        self._keys.append(key)
+        self._pos[bus] = len(self._ids) - 1
+        self._sift_up(len(self._ids) - 1)
+
+    def pop(self):
+        bus, key = self._ids[0], self._keys[0]
+        self._swap(0, len(self._ids) - 1)
+        self._ids.pop()
+        self._keys.pop()
+        del self._pos[bus]
+        if self._ids:
+            self._sift_down(0)
+        return bus, key
+
+    def update(self, bus, key):
+        i = self._pos[bus]
+        old = self._keys[i]
+        self._keys[i] = key
+        if key < old:
+            self._sift_up(i)
+        else:
+            self._sift_down(i)
+
+    def _swap(self, i, j):
+        ids, keys = self._ids, self._keys
+        ids[i], ids[j] = ids[j], ids[i]
+        keys[i], keys[j] = keys[j], keys[i]
+        self._pos[ids[i]] = i
+        self._pos[ids[j]] = j
+
+    def _sift_up(self, i):
+        keys = self._keys
+        while i > 0:
+            parent = (i - 1) // 2
+            if keys[i] >= keys[parent]:
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i):
+        keys, n = self._keys, len(self._keys)
+        while True:
+            smallest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < n and keys[child] < keys[smallest]:
+                    smallest = child
+            if smallest == i:
+                return
+            self._swap(i, smallest)
+            i = smallest
+
+
+class ChargerQueue:
+    """Charger assignment that follows single-bus SoC updates incrementally.
+
+    A float ``soc`` array is shared, not copied, so the queue can sit directly
+    on a fleet store's SoC column and its updates show up there.
+    """
+
+    def __init__(self, soc, num_chargers, min_dispatch_soc):
+        soc = np.asarray(soc)
+        self.soc = soc if soc.dtype.kind == "f" else soc.astype(np.float64)
+        self.min_dispatch_soc = min_dispatch_soc
+
+        picked = lowest_soc_indices(self.soc, num_chargers)
+        rest = np.setdiff1d(np.arange(self.soc.size), picked, assume_unique=True)
+        # Max-heap of charging buses is stored with negated keys
+        self._charging = IndexedHeap(picked.tolist(), (-self.soc[picked]).tolist())
+        self._waiting = IndexedHeap(rest.tolist(), self.soc[rest].tolist())
+
+        self.assigned = set(picked.tolist())
+        self.risk_count = int((self.soc < min_dispatch_soc).sum())
+        self.soc_sum = float(self.soc.sum())
+
+    @property
+    def mean_soc(self):
+        return self.soc_sum / self.soc.size
+
+    def set_min_dispatch_soc(self, min_dispatch_soc):
+        """Change the dispatch threshold (a full O(n) recount)."""
+        self.min_dispatch_soc = min_dispatch_soc
+        self.risk_count = int((self.soc < min_dispatch_soc).sum())
+
+    def assigned_mask(self):
+        mask = np.zeros(self.soc.size, dtype=bool)
+        mask[list(self.assigned)] = True
+        return mask
+
+    def update(self, bus, soc):
+        """Apply one SoC reading for ``bus`` and rebalance the assignment."""
+        old = self.soc[bus]
+        self.soc[bus] = soc
+        self.soc_sum += float(soc) - float(old)
+        self.risk_count += int(soc < self.min_dispatch_soc) - int(old < self.min_dispatch_soc)
+
+        if bus in self.assigned:
+            self._charging.update(bus, -soc)
+        else:
+            self._waiting.update(bus, soc)
+
+        # A charging bus now fuller than the emptiest waiting bus hands over
+        if self._charging and self._waiting:
+            top_bus, neg_key = self._charging.peek()
+            low_bus, low_key = self._waiting.peek()
+            if -neg_key > low_key:
+                self._charging.pop()
+                self._waiting.pop()
+                self._charging.push(low_bus, -low_key)
+                self._waiting.push(top_bus, -neg_key)
+                self.assigned.discard(top_bus)
+                self.assigned.add(low_bus)
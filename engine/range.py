@@ -0,0 +1,42 @@
+"""Driving-range prediction adjusted for temperature and passenger load.
+
+Factors follow the Athens case study the dashboard cites: range is best
+between 15 and 25 °C, drops 20 % in cool or mild-warm weather and 30 % above
+30 °C, and full passenger load costs up to 30 %. Battery health scales the
+usable capacity. Every input may be a scalar or a per-bus array, so a whole
+fleet is one broadcast expression.
+"""
+
+import numpy as np
+
+BUS_TYPES = ("40 ft", "60 ft articulated", "Double-decker")
+# Full-battery range (km) by bus type in mild weather with an empty bus
+BASE_RANGE_KM = np.array([250.0, 200.0, 215.0])
+
+
+def temperature_factor(temperature):
+    t = np.asarray(temperature, dtype=np.float64)
+    return np.where((t >= 15) & (t <= 25), 1.0, np.where(t > 30, 0.7, 0.8))
+
+
+def load_adjustment(load_factor):
+    return 1.0 - (np.asarray(load_factor, dtype=np.float64) / 100) * 0.3
+
+
+def predict_range(soc, temperature, load_factor, health=100.0, bus_type=0):
+    """Estimated range (km) for each bus.
+
+    ``bus_type`` indexes ``BUS_TYPES``; ``health`` is the percent of original
+    capacity still usable.
+    """
+    soc = np.asarray(soc, dtype=np.float64)
+    health = np.asarray(health, dtype=np.float64)
+    base = BASE_RANGE_KM[np.asarray(bus_type)]
+    # Fold the (usually scalar) condition factors together before touching arrays
+    conditions = temperature_factor(temperature) * load_adjustment(load_factor) / 1e4
+    return base * soc * health * conditions
+
+
+def range_status(temperature):
+    """Headline for the Range Status card."""
+    return "↓ Limited" if temperature < 10 or temperature > 30 else "✅ Optimal"
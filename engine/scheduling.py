@@ -0,0 +1,133 @@
+"""Power-capped, tariff-aware charging schedules.
+
+The planner fills intervals cheapest-first. Inside an interval the buses with
+the least slack before pull-out (intervals left to departure minus the
+intervals still needed to reach the dispatch threshold) get a charger first,
+then the buses furthest from full, and power is handed out in that order
+until the charger count or the site limit is used up. A second pass walks
+the expensive intervals forward in time, in the same order, for buses that
+would otherwise pull out below the dispatch threshold. Everything is a short
+loop over intervals with array work over buses, so a 200-bus, 96-interval day
+plans in milliseconds.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from engine.simulation import BATTERY_KWH, CHARGER_KW
+
+SITE_LIMIT_KW = 2800.0
+
+
+@dataclass
+class ChargingSchedule:
+    power_kw: np.ndarray  # (intervals, buses) charger power
+    prices: np.ndarray  # $/kWh per interval
+    interval_minutes: float
+    initial_soc: np.ndarray
+    final_soc: np.ndarray
+    num_chargers: int
+
+    @property
+    def site_kw(self):
+        return self.power_kw.sum(axis=1)
+
+    @property
+    def peak_kw(self):
+        return float(self.site_kw.max(initial=0.0))
+
+    @property
+    def energy_kwh(self):
+        return float(self.power_kw.sum() * self.interval_minutes / 60.0)
+
+    @property
+    def cost(self):
+        return float(self.site_kw @ self.prices * self.interval_minutes / 60.0)
+
+    def dispatch_risk(self, min_soc):
+        return self.final_soc < min_soc
+
+    def charger_power(self):
+        """(intervals, chargers) power, packing active buses onto chargers."""
+        out = np.zeros((self.power_kw.shape[0], self.num_chargers))
+        active = self.power_kw > 0
+        slot = np.cumsum(active, axis=1) - 1
+        rows, cols = np.nonzero(active)
+        out[rows, slot[rows, cols]] = self.power_kw[rows, cols]
+        return out
+
+
+def _fill(power, need, eligible, order, num_chargers, charger_kw,
+          site_limit_kw, energy_per_kw, soc_now, departure, min_soc):
+    per_interval = charger_kw * energy_per_kw  # SoC a full charger adds per interval
+    for t in order:
+        headroom = site_limit_kw - power[t].sum()
+        if headroom <= 0:
+            continue
+        want = np.minimum(charger_kw - power[t], need / energy_per_kw)
+        want[~eligible[t]] = 0.0
+        cand = np.flatnonzero(want > 1e-9)
+        if cand.size == 0:
+            continue
+        short = np.maximum(min_soc - soc_now[cand], 0.0)
+        slack = np.where(short > 0, departure[cand] - t - short / per_interval, np.inf)
+        cand = cand[np.lexsort((soc_now[cand], slack))]
+
+        # Buses already plugged in can top up; new ones need a free charger
+        plugged = power[t] > 0
+        new = ~plugged[cand]
+        free = num_chargers - int(plugged.sum())
+        cand = cand[~new | (np.cumsum(new) <= free)]
+
+        take = want[cand]
+        granted = np.clip(headroom - (np.cumsum(take) - take), 0.0, take)
+        power[t, cand] += granted
+        delivered = granted * energy_per_kw
+        need[cand] -= delivered
+        soc_now[cand] += delivered
+
+
+def plan_charging(initial_soc, num_chargers, prices, departure=None,
+                  interval_minutes=15, max_price=None, min_soc=60.0,
+                  site_limit_kw=SITE_LIMIT_KW, charger_kw=CHARGER_KW,
+                  battery_kwh=BATTERY_KWH, target_soc=100.0):
+    """Plan per-bus charger power for every interval of the horizon.
+
+    ``departure`` is the index of the interval at which each bus must be
+    ready (defaults to the end of the horizon). Intervals priced above
+    ``max_price`` are only used to lift buses up to ``min_soc``.
+    """
+    soc = np.array(initial_soc, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    intervals, n = prices.size, soc.size
+    if departure is None:
+        departure = np.full(n, intervals)
+    departure = np.asarray(departure)
+
+    # Percent of SoC gained per kW held for one interval
+    energy_per_kw = interval_minutes / 60.0 / battery_kwh * 100.0
+    eligible = np.arange(intervals)[:, None] < departure[None, :]
+    power = np.zeros((intervals, n))
+    soc_now = soc.copy()
+
+    order = np.argsort(prices, kind="stable")
+    cheap = order if max_price is None else order[prices[order] <= max_price]
+    need = np.maximum(target_soc - soc_now, 0.0)
+    _fill(power, need, eligible, cheap, num_chargers, charger_kw,
+          site_limit_kw, energy_per_kw, soc_now, departure, min_soc)
+
+    if max_price is not None:
+        need = np.maximum(min_soc - soc_now, 0.0)
+        if need.any():
+            _fill(power, need, eligible, np.arange(intervals), num_chargers, charger_kw,
+                  site_limit_kw, energy_per_kw, soc_now, departure, min_soc)
+
+    return ChargingSchedule(
+        power_kw=power,
+        prices=prices,
+        interval_minutes=interval_minutes,
+        initial_soc=soc,
+        final_soc=soc_now,
+        num_chargers=num_chargers,
+    )
@@ -0,0 +1,136 @@
+"""Time-stepped depot charging simulation.
+
+The whole fleet advances one step at a time; every step is a handful of
+array operations over all buses, so a 500-bus night at 1-minute resolution
+costs a few hundred small NumPy calls rather than a Python loop per bus.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from engine.assignment import lowest_soc_indices
+
+BATTERY_KWH = 450.0  # usable pack size of a 40 ft battery-electric bus
+CHARGER_KW = 150.0  # depot plug-in charger rating
+SERVICE_KW = 25.0  # average draw while in revenue service
+
+
+@dataclass
+class SimulationResult:
+    hours: np.ndarray  # clock hour at the start of each step
+    power_kw: np.ndarray  # total depot charging power per step
+    mean_soc: np.ndarray  # fleet mean SoC at the end of each step
+    chargers_busy: np.ndarray  # occupied chargers per step
+    final_soc: np.ndarray  # per-bus SoC at the end of the run
+    departure_soc: np.ndarray  # per-bus lowest SoC seen at pull-out
+
+    def dispatch_risk(self, min_soc):
+        """Buses that left (or would leave) the depot below ``min_soc``."""
+        return self.departure_soc < min_soc
+
+    def hourly(self):
+        """Mean power and end-of-hour SoC for each clock hour covered."""
+        hour = np.floor(self.hours).astype(int)
+        labels, start = np.unique(hour, return_index=True)
+        counts = np.diff(np.append(start, hour.size))
+        power = np.add.reduceat(self.power_kw, start) / counts
+        soc = self.mean_soc[start + counts - 1]
+        return labels % 24, power, soc
+
+
+def simulate_depot(initial_soc, num_chargers, hours=8.0, step_minutes=1.0,
+                   start_hour=0.0, pull_out=None, pull_in=None,
+                   charger_kw=CHARGER_KW, battery_kwh=BATTERY_KWH,
+                   service_kw=SERVICE_KW, target_soc=100.0, site_limit_kw=None):
+    """Advance the fleet through ``hours`` of depot operation.
+
+    ``pull_out``/``pull_in`` give each bus's service blocks as clock hours,
+    either one block per bus (shape ``(n,)``) or several (shape
+    ``(n, blocks)``). Buses in service drain at ``service_kw``; buses in the
+    depot queue for a charger, lowest SoC first, and hold it until they reach
+    ``target_soc`` or pull out. When the chargers together would exceed
+    ``site_limit_kw`` they are throttled evenly to stay under it. Without a
+    duty schedule every bus stays in the depot and its departure SoC is the
+    SoC at the end of the run.
+    """
+    soc = np.array(initial_soc, dtype=np.float64)
+    n = soc.size
+    steps = int(round(hours * 60.0 / step_minutes))
+    dt_h = step_minutes / 60.0
+    charge_step = charger_kw * dt_h / battery_kwh * 100.0
+    drain_step = service_kw * dt_h / battery_kwh * 100.0
+
+    if pull_out is not None:
+        pull_out = np.asarray(pull_out, dtype=np.float64).reshape(n, -1)
+        pull_in = np.asarray(pull_in, dtype=np.float64).reshape(n, -1)
+
+    clock = start_hour + np.arange(steps) * dt_h
+    power_kw = np.zeros(steps)
+    mean_soc = np.zeros(steps)
+    chargers_busy = np.zeros(steps, dtype=np.int32)
+    departure_soc = np.full(n, np.inf)
+
+    on_charger = np.zeros(n, dtype=bool)
+    in_service = np.zeros(n, dtype=bool)
+
+    for t in range(steps):
+        if pull_out is not None:
+            hod = clock[t] % 24.0
+            now_out = ((hod >= pull_out) & (hod < pull_in)).any(axis=1)
+            leaving = now_out & ~in_service
+            departure_soc[leaving] = np.minimum(departure_soc[leaving], soc[leaving])
+            in_service = now_out
+            on_charger &= ~in_service
+
+        # Release full buses, then hand free chargers to the emptiest waiting buses
+        on_charger &= soc < target_soc
+        free = num_chargers - int(on_charger.sum())
+        if free > 0:
+            waiting = np.flatnonzero(~on_charger & ~in_service & (soc < target_soc))
+            if waiting.size:
+                pick = waiting[lowest_soc_indices(soc[waiting], free)]
+                on_charger[pick] = True
+
+        gained = np.minimum(charge_step, target_soc - soc[on_charger])
+        if site_limit_kw is not None:
+            drawn = gained.sum() / 100.0 * battery_kwh / dt_h
+            if drawn > site_limit_kw:
+                gained *= site_limit_kw / drawn
+        soc[on_charger] += gained
+        soc[in_service] = np.maximum(soc[in_service] - drain_step, 0.0)
+
+        power_kw[t] = gained.sum() / 100.0 * battery_kwh / dt_h
+        mean_soc[t] = soc.mean()
+        chargers_busy[t] = on_charger.sum()
+
+    never_left = np.isinf(departure_soc)
+    departure_soc[never_left] = soc[never_left]
+
+    return SimulationResult(
+        hours=clock,
+        power_kw=power_kw,
+        mean_soc=mean_soc,
+        chargers_busy=chargers_busy,
+        final_soc=soc,
+        departure_soc=departure_soc,
+    )
+
+
+def staggered_duty(num_buses, seed=0):
+    """Two-block weekday duty schedule (AM and PM peaks) for a depot fleet.
+
+    Returns ``(pull_out, pull_in)`` arrays of shape ``(num_buses, 2)`` in clock
+    hours. Roughly a third of the fleet runs all day as a single long block.
+    """
+    rng = np.random.default_rng(seed)
+    am_out = rng.choice([5.0, 5.5, 6.0, 6.5, 7.0], num_buses)
+    am_in = am_out + rng.choice([3.0, 4.0, 5.0], num_buses)
+    pm_out = rng.choice([14.5, 15.0, 15.5, 16.0], num_buses)
+    pm_in = pm_out + rng.choice([4.0, 5.0, 6.5], num_buses)
+
+    all_day = rng.random(num_buses) < 0.33
+    am_in[all_day] = pm_in[all_day]
+    pm_out[all_day] = pm_in[all_day]
+
+    return np.column_stack([am_out, pm_out]), np.column_stack([am_in, pm_in])
@@ -0,0 +1,95 @@
+"""Columnar fleet state backed by typed NumPy arrays.
+
+One ``FleetStore`` holds the whole fleet as flat arrays (int32 ids, float32
+SoC/health/range, int8 bus-type codes, bool maintenance flags). Bus labels
+come from a shared, interned table, so building a label column never formats
+strings per rerun.
+Readers take array views or a thin DataFrame wrapper instead of rebuilding
+the fleet from Python lists.
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from engine.range import BUS_TYPES
+
+_LABELS = {}
+
+
+def bus_labels(count, prefix="Bus_"):
+    """Interned labels ``prefix1 .. prefix{count}`` as a read-only view."""
+    table = _LABELS.get(prefix)
+    if table is None or table.size < count:
+        size = max(count, 2 * (0 if table is None else table.size), 64)
+        table = np.array([sys.intern(f"{prefix}{i + 1}") for i in range(size)], dtype=object)
+        table.flags.writeable = False
+        _LABELS[prefix] = table
+    return table[:count]
+
+
+class FleetStore:
+    """Per-bus fleet state as typed columns."""
+
+    COLUMNS = ("bus_id", "soc", "health", "range_km", "bus_type", "maintenance")
+
+    def __init__(self, size, label_prefix="Bus_"):
+        self.label_prefix = label_prefix
+        self.bus_id = np.arange(1, size + 1, dtype=np.int32)
+        self.soc = np.zeros(size, dtype=np.float32)
+        self.health = np.full(size, 100.0, dtype=np.float32)
+        self.range_km = np.zeros(size, dtype=np.float32)
+        self.bus_type = np.zeros(size, dtype=np.int8)
+        self.maintenance = np.zeros(size, dtype=bool)
+        self.version = 0
+        self._order = {}
+
+    def __len__(self):
+        return self.bus_id.size
+
+    @classmethod
+    def synthetic(cls, size, seed=None, label_prefix="Bus_", soc_range=(20, 100),
+                  health_range=(92, 100), maintenance_rate=0.2, type_mix=(0.7, 0.2, 0.1)):
+        """Random fleet snapshot, reproducible when ``seed`` is given."""
+        store = cls(size, label_prefix)
+        rng = np.random.default_rng(seed)
+        store.soc[:] = rng.integers(*soc_range, size)
+        store.health[:] = rng.integers(*health_range, size, endpoint=True)
+        store.maintenance[:] = rng.random(size) < maintenance_rate
+        store.bus_type[:] = rng.choice(len(type_mix), size, p=type_mix)
+        return store
+
+    @property
+    def labels(self):
+        return bus_labels(len(self), self.label_prefix)
+
+    @property
+    def type_names(self):
+        return np.array(BUS_TYPES, dtype=object)[self.bus_type]
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.COLUMNS)
+
+    def touch(self):
+        """Mark the state as changed so cached readers know to refresh."""
+        self.version += 1
+
+    def order_by(self, column):
+        """Row positions sorted by ``column``, cached until the next ``touch()``."""
+        cached = self._order.get(column)
+        if cached is None or cached[0] != self.version:
+            cached = (self.version, np.argsort(getattr(self, column), kind="stable"))
+            self._order[column] = cached
+        return cached[1]
+
+    def frame(self, columns, rows=None):
+        """DataFrame over the store for display.
+
+        ``columns`` maps output column names to store attributes or properties
+        (e.g. ``"labels"``); ``rows`` is an optional slice or index array.
+        """
+        sel = slice(None) if rows is None else rows
+        data = {name: getattr(self, attr)[sel] for name, attr in columns.items()}
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,57 @@
+"""Whole-grid parameter sweep for the depot planning sliders.
+
+Every (buses, chargers, minimum dispatch SoC) combination is evaluated in a
+single broadcast over a ``(buses, chargers, min_soc, bus_rank)`` array. Fleet
+``N`` is the first ``N`` buses of one seeded snapshot, which matches what the
+depot script shows for the same slider value.
+
+The charging model is the one-shot assignment the depot table shows: the
+``c`` emptiest buses each gain one window of charging and nobody else charges.
+That ignores chargers being handed on once a bus is full, so the risk surface
+is a conservative (upper) bound on the time-stepped simulation.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from engine.simulation import BATTERY_KWH, CHARGER_KW
+
+
+@dataclass
+class SweepResult:
+    buses: np.ndarray
+    chargers: np.ndarray
+    min_soc: np.ndarray
+    risk: np.ndarray  # (buses, chargers, min_soc) buses below threshold
+    utilization: np.ndarray  # (buses, chargers) percent of chargers in use
+
+    def risk_at(self, min_soc):
+        """(buses, chargers) risk surface for one dispatch threshold."""
+        return self.risk[:, :, int(np.searchsorted(self.min_soc, min_soc))]
+
+
+def sweep_grid(fleet_soc, buses, chargers, min_soc, hours=3.0,
+               charger_kw=CHARGER_KW, battery_kwh=BATTERY_KWH, target_soc=100.0):
+    """Risk and charger utilisation for every slider combination at once.
+
+    ``fleet_soc`` must hold at least ``max(buses)`` readings; fleet size ``N``
+    uses the first ``N`` of them.
+    """
+    fleet_soc = np.asarray(fleet_soc, dtype=np.float64)
+    buses, chargers, min_soc = (np.asarray(a) for a in (buses, chargers, min_soc))
+    width = int(buses.max())
+
+    # Row per fleet size: its buses sorted by SoC, padded past N with +inf
+    rank = np.arange(width)
+    by_size = np.where(rank < buses[:, None], fleet_soc[:width], np.inf)
+    by_size.sort(axis=1)
+
+    gain = charger_kw * hours / battery_kwh * 100.0
+    charged = rank[None, None, :] < chargers[None, :, None]
+    post = np.where(charged, np.minimum(by_size[:, None, :] + gain, target_soc), by_size[:, None, :])
+
+    risk = (post[:, :, None, :] < min_soc[None, None, :, None]).sum(axis=-1)
+    utilization = np.minimum(chargers[None, :], buses[:, None]) / chargers[None, :] * 100.0
+    return SweepResult(buses=buses, chargers=chargers, min_soc=min_soc,
+                       risk=risk, utilization=utilization)
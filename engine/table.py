@@ -0,0 +1,79 @@
+"""Server-side fleet table: colour bands, filtering, sorting and paging.
+
+Tables are queried against a ``FleetStore`` so only the visible page is ever
+turned into a DataFrame. Sorting walks the store's cached per-column sort
+index and filtering is a boolean mask gathered through it, so a query over a
+100k-bus fleet is a few vector operations.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# SoC colour bands used across the dashboards: (upper bound, marker, label)
+SOC_BANDS = (
+    (50, "🟣", "Low"),
+    (80, "🟡", "Moderate"),
+    (np.inf, "🟢", "High"),
+)
+_BAND_EDGES = np.array([upper for upper, _, _ in SOC_BANDS[:-1]], dtype=np.float64)
+_BAND_TEXT = np.array([f"{marker} {label}" for _, marker, label in SOC_BANDS], dtype=object)
+
+
+def soc_band(soc):
+    """Band index per bus: 0 for SoC <= 50, 1 for <= 80, 2 above."""
+    return np.searchsorted(_BAND_EDGES, np.asarray(soc), side="left")
+
+
+def soc_band_labels(soc):
+    """Band marker text per bus, e.g. ``"🟢 High"``, via one lookup."""
+    return _BAND_TEXT[soc_band(soc)]
+
+
+@dataclass
+class TableQuery:
+    sort_by: str = "bus_id"  # FleetStore column
+    descending: bool = False
+    soc_below: float = None  # keep buses with SoC under this value
+    maintenance: bool = None  # keep only buses with this maintenance flag
+    page: int = 0
+    page_size: int = 100
+
+
+@dataclass
+class TablePage:
+    rows: np.ndarray  # store positions on this page, in display order
+    total: int  # rows matching the filters
+    page: int
+    pages: int
+    start: int  # offset of the first row on this page
+
+    def caption(self):
+        if self.total == 0:
+            return "No buses match the filters"
+        last = self.start + self.rows.size
+        return (f"Rows {self.start + 1:,}-{last:,} of {self.total:,} "
+                f"(page {self.page + 1} of {self.pages})")
+
+
+def query_rows(store, query):
+    """Positions of the rows on the requested page of a filtered, sorted view."""
+    order = store.order_by(query.sort_by)
+    if query.descending:
+        order = order[::-1]
+
+    keep = None
+    if query.soc_below is not None:
+        keep = store.soc < query.soc_below
+    if query.maintenance is not None:
+        flagged = store.maintenance == query.maintenance
+        keep = flagged if keep is None else keep & flagged
+    if keep is not None:
+        order = order[keep[order]]
+
+    total = order.size
+    pages = max(-(-total // query.page_size), 1)
+    page = min(max(query.page, 0), pages - 1)
+    start = page * query.page_size
+    return TablePage(rows=order[start:start + query.page_size], total=total,
+                     page=page, pages=pages, start=start)
@@ -0,0 +1,226 @@
+"""Time-of-use tariffs loaded from JSON definitions.
+
+A tariff names its ToU periods and, per season (a set of months), gives each
+period's energy rate plus the day's period boundaries for weekdays and for
+weekends (holidays count as weekends). Loading expands that into a
+``(month, day type, minute of day)`` table of period codes, so pricing any
+series is a handful of array operations over ``datetime64`` timestamps.
+
+Demand charges bill the highest fixed-block average demand (15 minutes by
+default) in each calendar month, optionally only over some periods.
+"""
+
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+TARIFF_DIR = Path(__file__).resolve().parent.parent / "data" / "tariffs"
+DEFAULT_TARIFF = TARIFF_DIR / "depot_tou.json"
+
+_MINUTES = 24 * 60
+
+
+@dataclass
+class DemandCharge:
+    name: str
+    rate: float  # $ per kW of monthly billed demand
+    periods: tuple = None  # ToU periods it applies in; None for all hours
+
+
+@dataclass
+class TariffCost:
+    energy_kwh: float
+    energy_cost: float
+    demand_cost: float
+    period_kwh: dict  # energy per ToU period
+    period_cost: dict
+    billed_kw: dict  # demand charge -> highest monthly billed demand
+
+    @property
+    def total(self):
+        return self.energy_cost + self.demand_cost
+
+
+def _month_day_minute(times):
+    # Calendar fields of each time as integers. Months come from a per-day
+    # table, since datetime64 month conversion is slow per element
+    minutes = np.atleast_1d(np.asarray(times, dtype="datetime64[m]")).astype(np.int64)
+    day = minutes // _MINUTES
+    minute = minutes - day * _MINUTES
+    if not day.size:
+        return day, day, minute
+    first = day.min()
+    dates = np.arange(first, day.max() + 1).astype("datetime64[D]")
+    month = (dates.astype("datetime64[M]").astype(np.int64) % 12)[day - first]
+    return month, day, minute
+
+
+class Tariff:
+    def __init__(self, name, periods, season_rates, season_of_month, schedule,
+                 holidays=(), demand_charges=(), demand_window_minutes=15, description=""):
+        self.name = name
+        self.description = description
+        self.periods = tuple(periods)
+        self.season_rates = season_rates  # (seasons, periods) $/kWh
+        self.season_of_month = season_of_month  # (12,) season index
+        self.schedule = schedule  # (12, 2, 1440) period codes; day type 1 = weekend
+        self.holidays = np.asarray(holidays, dtype="datetime64[D]")
+        self.demand_charges = tuple(demand_charges)
+        self.demand_window_minutes = demand_window_minutes
+        self._rate_by_month = season_rates[season_of_month]  # (12, periods)
+
+    @classmethod
+    def from_dict(cls, spec):
+        periods = list(spec["periods"])
+        code = {name: i for i, name in enumerate(periods)}
+        season_rates = np.zeros((len(spec["seasons"]), len(periods)))
+        season_of_month = np.full(12, -1)
+        schedule = np.zeros((12, 2, _MINUTES), dtype=np.int8)
+        for s, season in enumerate(spec["seasons"]):
+            season_rates[s] = [season["rates"][name] for name in periods]
+            months = np.asarray(season["months"]) - 1
+            season_of_month[months] = s
+            for day_type, key in enumerate(("weekday", "weekend")):
+                day = np.zeros(_MINUTES, dtype=np.int8)
+                for start, name in season[key]:
+                    day[int(round(start * 60)):] = code[name]
+                schedule[months, day_type] = day
+        if (season_of_month < 0).any():
+            missing = ", ".join(str(m + 1) for m in np.flatnonzero(season_of_month < 0))
+            raise ValueError(f"tariff {spec['name']!r} has no season for month(s) {missing}")
+        charges = [
+            DemandCharge(c["name"], c["rate"], None if c.get("periods") is None else tuple(c["periods"]))
+            for c in spec.get("demand_charges", ())
+        ]
+        return cls(spec["name"], periods, season_rates, season_of_month, schedule,
+                   holidays=spec.get("holidays", ()), demand_charges=charges,
+                   demand_window_minutes=spec.get("demand_window_minutes", 15),
+                   description=spec.get("description", ""))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def _codes(self, month, day, minute):
+        # 1970-01-01 was a Thursday: weekday 0 = Monday
+        weekend = (day + 3) % 7 >= 5
+        if self.holidays.size and day.size:
+            # Holiday flags over the covered day range, looked up by offset
+            first = day.min()
+            holiday = np.zeros(day.max() - first + 1, dtype=bool)
+            offset = self.holidays.astype(np.int64) - first
+            holiday[offset[(offset >= 0) & (offset < holiday.size)]] = True
+            weekend |= holiday[day - first]
+        return self.schedule[month, weekend.astype(np.intp), minute]
+
+    def period_codes(self, times):
+        """Index into ``periods`` of each (local, naive) ``datetime64`` time."""
+        return self._codes(*_month_day_minute(times))
+
+    def rates(self, times):
+        """Energy rate ($/kWh) in force at each time."""
+        month, day, minute = _month_day_minute(times)
+        return self._rate_by_month[month, self._codes(month, day, minute)]
+
+    def prices(self, start, intervals, interval_minutes=15):
+        """Rate of each interval of a schedule starting at ``start``."""
+        step = np.timedelta64(int(round(interval_minutes * 60)), "s")
+        return self.rates(np.datetime64(start, "s") + np.arange(intervals) * step)
+
+    def rate(self, period, when):
+        """Energy rate of ``period`` in the season containing ``when``."""
+        month = _month_day_minute(np.datetime64(when, "m"))[0]
+        return float(self._rate_by_month[month[0], self.periods.index(period)])
+
+    def label(self, period, when):
+        """Selectbox label for a period, e.g. ``"Off-Peak (0.08 $/kWh)"``."""
+        return f"{period} ({self.rate(period, when):.2f} $/kWh)"
+
+    def demand_applies(self, charge, times):
+        """Mask of the ``times`` that ``charge`` bills demand over."""
+        if charge.periods is None:
+            return np.ones(np.shape(times), dtype=bool)
+        return np.isin(self.period_codes(times), [self.periods.index(p) for p in charge.periods])
+
+    def demand_terms(self, times):
+        """``(rate, applies)`` per demand charge over ``times``, as ESS dispatch takes them."""
+        return [(charge.rate, self.demand_applies(charge, times)) for charge in self.demand_charges]
+
+    def cost(self, times, kw, interval_minutes=None):
+        """Energy and demand charges for power ``kw`` sampled at ``times``.
+
+        Each reading holds for ``interval_minutes`` (by default the series'
+        average spacing).
+        """
+        start = np.asarray(times, dtype="datetime64[s]").astype(np.int64) / 60.0
+        times = np.asarray(times, dtype="datetime64[m]")
+        kw = np.asarray(kw, dtype=np.float64)
+        if interval_minutes is None:
+            span = start[-1] - start[0] if times.size > 1 else 60
+            interval_minutes = span / max(times.size - 1, 1)
+        kwh = kw * (interval_minutes / 60.0)
+
+        month, day, minute = _month_day_minute(times)
+        codes = self._codes(month, day, minute)
+        cost = kwh * self._rate_by_month[month, codes]
+        # Cast: bincount of an empty series comes back as integers
+        n = len(self.periods)
+        period_kwh = np.bincount(codes, weights=kwh, minlength=n).astype(np.float64)
+        period_cost = np.bincount(codes, weights=cost, minlength=n).astype(np.float64)
+
+        # Fixed clock-aligned demand blocks: average kW = block energy / block hours.
+        # Each reading holds until the next one starts or its interval ends, and
+        # its energy is shared among the blocks it overlaps by reading the
+        # cumulative energy curve at the block edges
+        billed = {charge.name: 0.0 for charge in self.demand_charges}
+        demand_cost = 0.0
+        if times.size:
+            end = np.minimum(start + interval_minutes, np.append(start[1:], np.inf))
+            held = kw * ((end - start) / 60.0)
+            energy = np.concatenate(([0.0], np.cumsum(held)))
+            curve_t = np.column_stack((start, end)).ravel()
+            curve_e = np.column_stack((energy[:-1], energy[1:])).ravel()
+            window = self.demand_window_minutes
+            first = int(np.floor(start[0] / window))
+            last = int(np.ceil(end[-1] / window))
+            edges = np.arange(first, last + 1) * float(window)
+            demand = np.diff(np.interp(edges, curve_t, curve_e)) / (window / 60.0)
+            block_start = edges[:-1].astype(np.int64).astype("datetime64[m]")
+            block_month = block_start.astype("datetime64[M]").astype(np.int64)
+            month_of_block = block_month - block_month[0]
+            months = np.arange(month_of_block[-1] + 1)
+
+            for charge in self.demand_charges:
+                applies = self.demand_applies(charge, block_start)
+                peaks = np.zeros(months.size)
+                np.maximum.at(peaks, month_of_block[applies], demand[applies])
+                billed[charge.name] = float(peaks.max())
+                demand_cost += float(peaks.sum()) * charge.rate
+
+        return TariffCost(
+            energy_kwh=float(kwh.sum()),
+            energy_cost=float(cost.sum()),
+            demand_cost=demand_cost,
+            period_kwh=dict(zip(self.periods, period_kwh.tolist())),
+            period_cost=dict(zip(self.periods, period_cost.tolist())),
+            billed_kw=billed,
+        )
+
+
+def available_tariffs(directory=TARIFF_DIR):
+    """Tariff name -> definition file for every JSON file in ``directory``."""
+    tariffs = {}
+    for path in sorted(Path(directory).glob("*.json")):
+        with open(path, encoding="utf-8") as f:
+            tariffs[json.load(f)["name"]] = path
+    return tariffs
+
+
+@lru_cache(maxsize=None)
+def load_tariff(path=DEFAULT_TARIFF):
+    """Parsed tariff, loaded once per process and path."""
+    return Tariff.load(path)
@@ -0,0 +1,418 @@
+"""Telemetry ingestion from a pluggable transport into the fleet state.
+
+Messages are newline-terminated text records::
+
+    <unix time>,b,<bus id>,<SoC %>          bus state of charge
+    <unix time>,c,<charger id>,<power kW>   charger output
+
+Bus ids are the 1-based ``FleetStore.bus_id``; charger ids run from 1 to the
+depot's charger count. A source (file tail, UDP, TCP, or the in-process gateway
+simulator) only has to hand back bytes holding whole lines. Parsing works on
+the whole chunk at once and falls back to line-by-line only when a chunk holds
+malformed records, which are counted and dropped (as are NaN or infinite
+times and values).
+"""
+
+import os
+import selectors
+import socket
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+
+import numpy as np
+
+from engine.aggregates import FleetAggregates
+
+TELEMETRY_PORT = 9870
+CHUNK_BYTES = 1 << 20  # most a source returns per read
+_FIELDS = 4
+_ID_RANGE = np.iinfo(np.int32)
+
+
+@dataclass
+class TelemetryBatch:
+    time: np.ndarray  # unix seconds, float64
+    charger: np.ndarray  # True for charger records, False for bus records
+    ident: np.ndarray  # 1-based bus or charger id
+    value: np.ndarray  # SoC % for buses, kW for chargers
+    rejected: int = 0  # malformed records dropped while parsing
+
+    @property
+    def size(self):
+        return self.time.size
+
+
+def _empty_batch(rejected=0):
+    return TelemetryBatch(time=np.empty(0), charger=np.empty(0, dtype=bool),
+                          ident=np.empty(0, dtype=np.int32), value=np.empty(0, dtype=np.float32),
+                          rejected=rejected)
+
+
+def _columns(fields):
+    fields = fields.reshape(-1, _FIELDS)
+    kind = fields[:, 1]
+    charger = kind == b"c"
+    known = charger | (kind == b"b")
+    return known, TelemetryBatch(
+        time=fields[:, 0].astype(np.float64),
+        charger=charger,
+        ident=fields[:, 2].astype(np.int32),
+        value=fields[:, 3].astype(np.float32),
+    )
+
+
+def parse_telemetry(data):
+    """Parse a chunk of whole lines into a ``TelemetryBatch``."""
+    if b"\r" in data:
+        data = data.replace(b"\r", b"")
+    lines = data.count(b"\n")
+    if not lines:
+        return _empty_batch()
+    fields = data.replace(b"\n", b",").split(b",")
+    del fields[-1]  # the empty field after the final newline
+    try:
+        if len(fields) != lines * _FIELDS:
+            raise ValueError("field count")
+        # Equal totals can still hide a short line next to a long one
+        raw = np.frombuffer(data, dtype=np.uint8)
+        commas = np.cumsum(raw == ord(","))[np.flatnonzero(raw == ord("\n"))]
+        if (np.diff(commas, prepend=0) != _FIELDS - 1).any():
+            raise ValueError("fields per line")
+        known, batch = _columns(np.array(fields))
+    except (ValueError, OverflowError):
+        good = []
+        for line in data.split(b"\n")[:lines]:
+            parts = line.split(b",")
+            if len(parts) != _FIELDS:
+                continue
+            try:
+                float(parts[0]), float(parts[3])
+                ident = int(parts[2])
+            except ValueError:
+                continue
+            if not _ID_RANGE.min <= ident <= _ID_RANGE.max:
+                continue
+            good.extend(parts)
+        if not good:
+            return _empty_batch(rejected=lines)
+        known, batch = _columns(np.array(good))
+    known &= np.isfinite(batch.time) & np.isfinite(batch.value)
+    if not known.all():
+        batch = TelemetryBatch(time=batch.time[known], charger=batch.charger[known],
+                               ident=batch.ident[known], value=batch.value[known])
+    batch.rejected = lines - batch.size
+    return batch
+
+
+class _LineSource:
+    """Keeps the unterminated tail of a stream until the rest arrives."""
+
+    def __init__(self):
+        self._partial = b""
+
+    def _complete(self, data):
+        data = self._partial + data
+        end = data.rfind(b"\n") + 1
+        self._partial = data[end:]
+        return data[:end]
+
+    def close(self):
+        pass
+
+
+class FileTailSource(_LineSource):
+    """Follows a log file like ``tail -F``: waits for it to exist, reopens it
+    after rotation (a new file at the path) and rereads it after truncation."""
+
+    def __init__(self, path, from_start=False):
+        super().__init__()
+        self.path = path
+        self.from_start = from_start
+        self._file = None
+
+    def read(self):
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            current = None
+        if self._file is not None:
+            opened = os.fstat(self._file.fileno())
+            if current is None or current.st_ino != opened.st_ino or current.st_dev != opened.st_dev:
+                # Rotated or deleted: finish the old file, then move to the new one
+                data = self._file.read(CHUNK_BYTES)
+                if data:
+                    return self._complete(data)
+                self.close()
+                self._partial = b""
+                if current is None:
+                    return b""
+                return self._open(from_start=True)
+            if current.st_size < self._file.tell():
+                self._file.seek(0)
+                self._partial = b""
+        elif current is None:
+            return b""
+        else:
+            return self._open(from_start=self.from_start)
+        return self._complete(self._file.read(CHUNK_BYTES))
+
+    def _open(self, from_start):
+        try:
+            self._file = open(self.path, "rb")
+        except FileNotFoundError:
+            return b""
+        if not from_start:
+            self._file.seek(0, os.SEEK_END)
+        return self._complete(self._file.read(CHUNK_BYTES))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class UdpSource:
+    """Datagrams of one or more records on a local UDP port."""
+
+    def __init__(self, host="127.0.0.1", port=TELEMETRY_PORT):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * CHUNK_BYTES)
+        self._sock.bind((host, port))
+        self._sock.setblocking(False)
+
+    def read(self):
+        chunks, size = [], 0
+        while size < CHUNK_BYTES:
+            try:
+                datagram = self._sock.recv(65536)
+            except BlockingIOError:
+                break
+            if not datagram.endswith(b"\n"):
+                datagram += b"\n"
+            chunks.append(datagram)
+            size += len(datagram)
+        return b"".join(chunks)
+
+    def close(self):
+        self._sock.close()
+
+
+class TcpSource:
+    """Line streams from any number of clients of a local TCP port."""
+
+    def __init__(self, host="127.0.0.1", port=TELEMETRY_PORT):
+        self._selector = selectors.DefaultSelector()
+        self._server = socket.create_server((host, port))
+        self._server.setblocking(False)
+        self._selector.register(self._server, selectors.EVENT_READ)
+
+    def read(self):
+        chunks, size = [], 0
+        for key, _ in self._selector.select(timeout=0):
+            if key.fileobj is self._server:
+                conn, _ = self._server.accept()
+                conn.setblocking(False)
+                self._selector.register(conn, selectors.EVENT_READ, _LineSource())
+                continue
+            if size >= CHUNK_BYTES:
+                break
+            try:
+                data = key.fileobj.recv(CHUNK_BYTES - size)
+            except BlockingIOError:
+                continue
+            except ConnectionError:
+                data = b""
+            if not data:
+                self._selector.unregister(key.fileobj)
+                key.fileobj.close()
+                continue
+            chunk = key.data._complete(data)
+            chunks.append(chunk)
+            size += len(chunk)
+        return b"".join(chunks)
+
+    def close(self):
+        for key in list(self._selector.get_map().values()):
+            key.fileobj.close()
+        self._selector.close()
+
+
+class GeneratorSource:
+    """In-process stand-in for the vehicle gateway.
+
+    Emits ``rate`` records per second of wall time (or ``batch`` per read when
+    ``rate`` is None): buses drift in SoC, and chargers report their output.
+    """
+
+    def __init__(self, buses, chargers=24, rate=5_000.0, batch=10_000, seed=None,
+                 charger_share=0.1, charger_kw=150.0):
+        self.buses = buses
+        self.chargers = chargers
+        self.rate = rate
+        self.batch = batch
+        self.charger_share = charger_share
+        self.charger_kw = charger_kw
+        self._rng = np.random.default_rng(seed)
+        self._soc = self._rng.uniform(20, 100, buses)
+        self._last = time.time()
+
+    def read(self):
+        now = time.time()
+        if self.rate is None:
+            count = self.batch
+        else:
+            count = min(int((now - self._last) * self.rate), CHUNK_BYTES // 32)
+            if not count:
+                return b""
+        self._last = now
+
+        rng = self._rng
+        charger = rng.random(count) < self.charger_share
+        ident = np.where(charger, rng.integers(1, self.chargers + 1, count),
+                         rng.integers(1, self.buses + 1, count))
+        buses = ident[~charger] - 1
+        self._soc[buses] = np.clip(self._soc[buses] + rng.normal(0.0, 0.5, buses.size), 0, 100)
+        value = np.empty(count)
+        value[~charger] = self._soc[buses]
+        value[charger] = self.charger_kw * (rng.random(charger.sum()) < 0.75)
+        kind = np.where(charger, "c", "b")
+        return "".join(
+            f"{now:.3f},{k},{i},{v:.1f}\n" for k, i, v in zip(kind.tolist(), ident.tolist(), value.tolist())
+        ).encode()
+
+    def close(self):
+        pass
+
+
+def _last_per_id(ids, values, scratch):
+    # Newest record per id in O(batch): fancy assignment leaves the last
+    # position written for each id, and only those positions read back as their own
+    order = np.arange(ids.size)
+    scratch[ids] = order
+    newest = scratch[ids] == order
+    return ids[newest], values[newest]
+
+
+def _pump(ref, stop, interval):
+    # Holds the ingestor only weakly, so an abandoned session's ingestor can be
+    # collected and its thread ends on the next tick
+    while not stop.is_set():
+        ingestor = ref()
+        if ingestor is None:
+            return
+        try:
+            received = ingestor.poll()
+        except Exception as exc:  # keep ingesting; the app shows the last error
+            ingestor.error = exc
+            received = 0
+        del ingestor
+        if not received:
+            stop.wait(interval)
+
+
+class TelemetryIngestor:
+    """Publishes parsed telemetry from ``source`` into ``fleet``.
+
+    Bus SoC lands in ``fleet.soc`` (and bumps ``fleet.version``); charger output
+    lands in ``charger_kw``. Records for unknown ids are counted as rejected.
+    With a ``MetricHistory`` attached, the state is sampled into it every
+    ``sample_seconds`` (grid draw being the chargers' total output).
+    ``aggregates`` (built over the fleet on creation) is kept in step with
+    every update, and an attached ``DemandMeter`` is fed the site draw after
+    each batch of charger reports.
+    Call ``poll()`` from the app, or ``start()`` a background thread. Updates
+    are made under ``lock``; with the thread running, hold it while reading
+    the fleet, ``charger_kw``, ``aggregates`` or the meter to avoid a
+    half-applied batch.
+    """
+
+    def __init__(self, source, fleet, num_chargers=24, history=None, sample_seconds=10.0,
+                 demand=None):
+        self.source = source
+        self.fleet = fleet
+        self.charger_kw = np.zeros(num_chargers, dtype=np.float32)
+        self.aggregates = FleetAggregates(fleet.soc, self.charger_kw)
+        self._bus_slot = np.empty(len(fleet), dtype=np.intp)
+        self._charger_slot = np.empty(num_chargers, dtype=np.intp)
+        self.history = history
+        self.demand = demand
+        self.sample_seconds = sample_seconds
+        self._sampled = None
+        self.received = 0
+        self.rejected = 0
+        self.last_time = None
+        self.error = None  # last exception raised by the source in the background thread
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def publish(self, batch):
+        bus = ~batch.charger & (batch.ident >= 1) & (batch.ident <= len(self.fleet))
+        charger = batch.charger & (batch.ident >= 1) & (batch.ident <= self.charger_kw.size)
+        with self.lock:
+            if bus.any():
+                rows, soc = _last_per_id(batch.ident[bus] - 1, np.clip(batch.value[bus], 0, 100),
+                                         self._bus_slot)
+                self.aggregates.update_soc(self.fleet.soc[rows], soc)
+                self.fleet.soc[rows] = soc
+                self.fleet.touch()
+            if charger.any():
+                rows, kw = _last_per_id(batch.ident[charger] - 1, batch.value[charger], self._charger_slot)
+                now = float(batch.time[charger].max())
+                self.aggregates.update_chargers(self.charger_kw[rows], kw, now)
+                self.charger_kw[rows] = kw
+                if self.demand is not None:
+                    self.demand.update(now, self.aggregates.site_kw)
+            accepted = int(bus.sum() + charger.sum())
+            self.received += accepted
+            self.rejected += batch.rejected + batch.size - accepted
+            if batch.size:
+                self.last_time = float(batch.time.max())
+        return accepted
+
+    def poll(self):
+        """Drain what the source has ready; returns records accepted."""
+        data = self.source.read()
+        accepted = self.publish(parse_telemetry(data)) if data else 0
+        if self.history is not None:
+            self.sample()
+        return accepted
+
+    def sample(self, now=None):
+        """Record the current state into ``history`` if a sample is due."""
+        now = time.time() if now is None else now
+        if self._sampled is not None and now - self._sampled < self.sample_seconds:
+            return
+        with self.lock:
+            self.history.record(now, self.fleet.soc, self.charger_kw, float(self.charger_kw.sum()))
+        self._sampled = now
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def rate(self):
+        """Records accepted per second since ``start()``."""
+        if self._started is None:
+            return 0.0
+        return self.received / max(time.perf_counter() - self._started, 1e-9)
+
+    def start(self, interval=0.05):
+        if self.running:
+            return
+        self._stop.clear()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=_pump, args=(weakref.ref(self), self._stop, interval),
+                                        name="telemetry-ingest", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.source.close()
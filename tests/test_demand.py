@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from engine.demand import DemandMeter
+
+
+def test_peak_waits_for_a_full_window():
+    meter = DemandMeter(window_seconds=900, limit_kw=1000)
+    meter.update(np.arange(0, 900, 60.0), np.full(15, 400.0))
+    assert meter.demand_kw == pytest.approx(400.0)
+    assert meter.peak_kw is None
+    assert meter.headroom_kw == pytest.approx(600.0)
+    meter.update(900.0, 400.0)
+    assert meter.peak_kw == pytest.approx(400.0)
+    assert meter.peak_time == 900.0
+
+
+def test_window_average_at_its_edges():
+    # 0 kW for ten minutes, then 900 kW: at 900 s a third of the window is high
+    meter = DemandMeter(window_seconds=900)
+    meter.update([0.0, 600.0], [0.0, 900.0])
+    meter.update(899.0, 900.0)
+    assert meter.peak_kw is None
+    meter.update(900.0, 900.0)
+    assert meter.demand_kw == pytest.approx(300.0)
+    assert meter.peak_kw == pytest.approx(300.0)
+    # The zero readings leave the window one second at a time
+    meter.update(1500.0, 900.0)
+    assert meter.demand_kw == pytest.approx(900.0)
+
+
+def test_each_reading_holds_until_the_next():
+    meter = DemandMeter(window_seconds=900)
+    meter.update([0.0, 450.0, 900.0], [1000.0, 0.0, 0.0])
+    assert meter.peak_kw == pytest.approx(500.0)
+
+
+def test_batches_match_one_stream_and_late_readings_are_dropped():
+    rng = np.random.default_rng(2)
+    times = np.cumsum(rng.uniform(1, 30, 400))
+    kw = rng.uniform(0, 2000, 400)
+    whole = DemandMeter()
+    whole.update(times, kw)
+    split = DemandMeter()
+    for part in np.array_split(np.arange(400), 7):
+        split.update(times[part], kw[part])
+    split.update(times[100], 1e6)  # out of order
+    assert split.peak_kw == pytest.approx(whole.peak_kw)
+    assert split.demand_kw == pytest.approx(whole.demand_kw)
+    assert split.nbytes <= whole.nbytes + 16 * 64
+
+
+def test_peak_resets_with_the_billing_month():
+    january = datetime(2026, 1, 31, 23, 0).timestamp()
+    february = datetime(2026, 2, 1).timestamp()
+    meter = DemandMeter(window_seconds=900)
+    meter.update(january + np.arange(0, 3600, 60.0), np.full(60, 2000.0))
+    assert meter.peak_kw == pytest.approx(2000.0)
+    meter.update(february + np.arange(0, 1800, 60.0), np.full(30, 500.0))
+    assert meter.period_start == february
+    # The window ending at midnight closes January; February's first window
+    # still holds 14 minutes of January's draw
+    assert meter.peak_kw == pytest.approx((14 * 2000.0 + 500.0) / 15)
+    assert meter.peak_time == february + 60
+    assert meter.demand_kw == pytest.approx(500.0)
+
+
+def test_memory_covers_one_window():
+    meter = DemandMeter(window_seconds=900)
+    for hour in range(24):
+        meter.update(hour * 3600 + np.arange(0, 3600, 1.0), np.full(3600, 100.0))
+    assert meter.nbytes <= 2 * 8 * 902
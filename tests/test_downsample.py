@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from engine.downsample import downsample
+
+
+@pytest.mark.parametrize("method", ["minmax", "lttb"])
+def test_output_stays_bounded_with_many_gaps(method):
+    x = np.arange(100_000, dtype=np.float64)
+    y = np.sin(x / 500.0)
+    y[np.random.default_rng(4).integers(0, x.size, 3_000)] = np.nan
+    dx, dy = downsample(x, y, 1000, method)
+    assert dx.size <= 1000
+    assert (np.diff(dx) > 0).all()
+    assert np.isnan(dy).any()
+    # Every kept value is an original sample
+    kept = ~np.isnan(dy)
+    assert (dy[kept] == y[dx[kept].astype(np.intp)]).all()
+
+
+def test_minmax_keeps_the_extremes():
+    x = np.arange(10_000, dtype=np.float64)
+    y = np.zeros(10_000)
+    y[1234], y[8765] = 50.0, -50.0
+    _, dy = downsample(x, y, 200, "minmax")
+    assert dy.max() == 50.0 and dy.min() == -50.0
+
+
+def test_short_series_pass_through():
+    x, y = np.arange(5.0), np.array([1.0, np.nan, 3.0, 4.0, 5.0])
+    dx, dy = downsample(x, y, 10)
+    assert dx.tolist() == x.tolist()
+    assert np.array_equal(dy, y, equal_nan=True)
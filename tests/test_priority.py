@@ -0,0 +1,69 @@
+import numpy as np
+
+from engine.priority import ChargerQueue, IndexedHeap
+
+
+def check(queue):
+    # The queue's bookkeeping must match a recount from the SoC array
+    mask = queue.assigned_mask()
+    assert mask.sum() == len(queue.assigned)
+    if mask.any() and not mask.all():
+        assert queue.soc[mask].max() <= queue.soc[~mask].min()
+    assert queue.risk_count == int((queue.soc < queue.min_dispatch_soc).sum())
+    assert np.isclose(queue.soc_sum, queue.soc.sum())
+
+
+def test_heap_pops_in_key_order_after_updates():
+    rng = np.random.default_rng(0)
+    keys = rng.uniform(0, 100, 50)
+    heap = IndexedHeap(range(50), keys.tolist())
+    for bus in rng.integers(0, 50, 200).tolist():
+        keys[bus] = rng.uniform(0, 100)
+        heap.update(bus, keys[bus])
+    heap.push(50, -1.0)
+    popped = [heap.pop() for _ in range(len(heap))]
+    assert popped[0] == (50, -1.0)
+    assert [key for _, key in popped[1:]] == sorted(keys.tolist())
+    assert 3 not in heap
+
+
+def test_queue_keeps_the_lowest_soc_buses_charging():
+    rng = np.random.default_rng(1)
+    soc = rng.uniform(0, 100, 200)
+    queue = ChargerQueue(soc, 20, 60)
+    check(queue)
+    for bus, value in zip(rng.integers(0, 200, 2000).tolist(), rng.uniform(0, 100, 2000).tolist()):
+        queue.update(bus, value)
+        check(queue)
+    assert len(queue.assigned) == 20
+
+
+def test_emptied_bus_takes_the_fullest_charger():
+    queue = ChargerQueue(np.array([10.0, 20.0, 30.0, 40.0]), 2, 25)
+    assert queue.assigned == {0, 1}
+    queue.update(3, 5.0)
+    assert queue.assigned == {0, 3}
+    queue.update(0, 90.0)
+    assert queue.assigned == {1, 3}
+    assert queue.risk_count == 2
+    check(queue)
+
+
+def test_soc_array_is_shared_and_thresholds_recount():
+    soc = np.array([50.0, 70.0, 90.0])
+    queue = ChargerQueue(soc, 1, 60)
+    queue.update(2, 10.0)
+    assert soc[2] == 10.0
+    assert queue.assigned == {2}
+    queue.set_min_dispatch_soc(80)
+    assert queue.risk_count == 3
+    check(queue)
+
+
+def test_no_chargers_or_more_chargers_than_buses():
+    soc = np.array([30.0, 60.0, 90.0])
+    assert ChargerQueue(soc.copy(), 0, 50).assigned == set()
+    queue = ChargerQueue(soc.copy(), 5, 50)
+    queue.update(1, 5.0)
+    assert queue.assigned == {0, 1, 2}
+    check(queue)
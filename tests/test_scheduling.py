@@ -0,0 +1,11 @@
+import numpy as np
+
+from engine.scheduling import plan_charging
+
+
+def test_early_departure_is_charged_to_dispatch_soc_first():
+    # One charger: the bus pulling out at interval 3 must not lose it to the
+    # emptier bus that has until interval 10
+    plan = plan_charging([40, 30], 1, np.full(10, 0.1), departure=[3, 10],
+                         max_price=0.1, min_soc=60)
+    assert not plan.dispatch_risk(60).any()
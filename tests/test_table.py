@@ -0,0 +1,24 @@
+import numpy as np
+
+from engine.store import FleetStore
+from engine.table import TableQuery, query_rows
+
+
+def test_pages_cover_the_filtered_sorted_view_once():
+    fleet = FleetStore.synthetic(1_050, seed=3)
+    query = dict(sort_by="soc", descending=True, soc_below=70, page_size=100)
+    pages = [query_rows(fleet, TableQuery(page=page, **query)) for page in range(20)]
+    rows = np.concatenate([page.rows for page in pages[:pages[0].pages]])
+    expected = np.flatnonzero(fleet.soc < 70)
+    assert pages[0].total == expected.size
+    assert sorted(rows.tolist()) == expected.tolist()
+    assert (np.diff(fleet.soc[rows]) <= 0).all()
+    # Pages past the end clamp to the last one
+    assert pages[-1].page == pages[0].pages - 1
+    assert pages[-1].rows.tolist() == pages[pages[0].pages - 1].rows.tolist()
+
+
+def test_no_match_is_one_empty_page():
+    page = query_rows(FleetStore.synthetic(10, seed=0), TableQuery(soc_below=-1, page=4))
+    assert (page.total, page.page, page.pages, page.rows.size) == (0, 0, 1, 0)
+    assert page.caption() == "No buses match the filters"
@@ -0,0 +1,42 @@
+import numpy as np
+
+from engine.telemetry import parse_telemetry
+
+
+def test_whole_chunk_is_parsed():
+    batch = parse_telemetry(b"100.5,b,3,55.5\n101,c,2,150\n")
+    assert batch.rejected == 0
+    assert batch.time.tolist() == [100.5, 101.0]
+    assert batch.charger.tolist() == [False, True]
+    assert batch.ident.tolist() == [3, 2]
+    assert batch.value.tolist() == [55.5, 150.0]
+
+
+def test_malformed_records_are_dropped_one_by_one():
+    data = (b"1,b,1,50\n"
+            b"2,b,99999999999,50\n"  # id past int32
+            b"3,b,x,50\n"
+            b"4,b,2,fifty\n"
+            b"5,b,3\n"
+            b"6,c,1,120\n"
+            b"7,q,4,50\n"  # unknown record kind
+            b"8,b,5,nan\n"
+            b"9,b,6,")  # truncated: the chunk ends mid-line
+    batch = parse_telemetry(data)
+    assert batch.time.tolist() == [1.0, 6.0]
+    assert batch.ident.tolist() == [1, 1]
+    assert batch.charger.tolist() == [False, True]
+    assert batch.rejected == 6
+
+
+def test_overflowing_id_alone_rejects_only_its_line():
+    batch = parse_telemetry(b"1,b,1,50\n2,b,-99999999999,50\n3,b,2,60\n")
+    assert batch.ident.tolist() == [1, 2]
+    assert batch.rejected == 1
+
+
+def test_empty_and_unterminated_input():
+    assert parse_telemetry(b"").size == 0
+    batch = parse_telemetry(b"1,b,1,50")
+    assert batch.size == 0 and batch.rejected == 0
+    assert np.isfinite(parse_telemetry(b"1,b,1,50\r\n").value).all()